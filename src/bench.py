@@ -0,0 +1,389 @@
+import argparse
+import glob
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from block_markdown import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from file_operations import generate_pages_recursive
+from htmlnode import ParentNode
+from inline_markdown import split_nodes_image, split_nodes_link, text_to_textnodes
+from template import Template
+from textnode import TextNode, TextType
+
+dir_path_content = "./content"
+template_path = "./template.html"
+
+# Relative weights of each block kind in a synthetic page
+DEFAULT_MIX = {
+    "heading": 2,
+    "paragraph": 6,
+    "dense": 2,
+    "code": 1,
+    "quote": 1,
+    "unordered": 2,
+    "ordered": 1,
+}
+
+# Repeated units of the single-paragraph inputs used by the adversarial
+# benchmark: generated index pages with thousands of links or images, and
+# link syntax that is never closed (which must not make the regexes rescan)
+ADVERSARIAL_UNITS = {
+    "links": "see [page {i}](/pages/{i}) and ",
+    "images": "![figure {i}](/images/{i}.png) ",
+    "mixed": "[page {i}](/pages/{i}) ![icon](/icon.png) **{i}** ",
+    "unclosed": "[page {i}](/pages/{i} ",
+    "brackets": "[[{i}] ",
+}
+
+_WORDS = (
+    "the ring of power was forged in the fires of mount doom and only there "
+    "could it be unmade by a hobbit of the shire who carried it east"
+).split()
+
+
+def load_corpus(dir_path: str = dir_path_content) -> list[str]:
+    documents = []
+    for path in sorted(glob.glob(os.path.join(dir_path, "**", "*.md"), recursive=True)):
+        with open(path) as f:
+            documents.append(f.read())
+    return documents
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+# Inline text with roughly one formatted span every few words. With
+# dense=True most spans are links and images, like a generated index page.
+def _inline(rng: random.Random, words: int, dense: bool = False) -> str:
+    parts = []
+    for _ in range(words):
+        roll = rng.random()
+        word = rng.choice(_WORDS)
+        if dense and roll < 0.3:
+            parts.append(f"[{word}](/pages/{rng.randrange(1000)})")
+        elif dense and roll < 0.45:
+            parts.append(f"![{word}](/images/{rng.randrange(100)}.png)")
+        elif roll < 0.05:
+            parts.append(f"**{word}**")
+        elif roll < 0.08:
+            parts.append(f"_{word}_")
+        elif roll < 0.1:
+            parts.append(f"`{word}`")
+        elif roll < 0.12:
+            parts.append(f"[{word}](https://example.com/{word})")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+
+def _block(rng: random.Random, kind: str) -> str:
+    match kind:
+        case "heading":
+            return "#" * rng.randint(2, 4) + " " + _sentence(rng, 4)
+        case "paragraph":
+            return "\n".join(_inline(rng, 14) for _ in range(rng.randint(2, 5)))
+        case "dense":
+            return "\n".join(_inline(rng, 20, dense=True) for _ in range(3))
+        case "code":
+            lines = [f"    {_sentence(rng, 5)}" for _ in range(rng.randint(3, 10))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        case "quote":
+            return "\n".join(f"> {_inline(rng, 10)}" for _ in range(rng.randint(1, 4)))
+        case "unordered":
+            return "\n".join(f"- {_inline(rng, 8)}" for _ in range(rng.randint(2, 8)))
+        case "ordered":
+            return "\n".join(f"{i}. {_inline(rng, 8)}" for i in range(1, rng.randint(3, 9)))
+        case _:
+            raise ValueError(f"unknown block kind: {kind}")
+
+
+# Builds one synthetic markdown page: an h1 title followed by blocks drawn
+# from the given mix of block kinds
+def generate_document(rng: random.Random, blocks: int, mix: dict[str, int]) -> str:
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=blocks)
+    return "\n\n".join(
+        ["# " + _sentence(rng, 5)] + [_block(rng, kind) for kind in kinds]
+    ) + "\n"
+
+
+# Writes a synthetic content tree of `pages` pages to dir_path, spread over
+# nested directories like a real site. Output is deterministic per seed.
+def generate_corpus(
+    dir_path: str,
+    pages: int,
+    blocks: int = 30,
+    mix: dict[str, int] | None = None,
+    seed: int = 0
+):
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    for i in range(pages):
+        page_dir = os.path.join(dir_path, f"section{i % 10}", f"page{i}")
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), "w") as f:
+            f.write(generate_document(rng, blocks, mix))
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    # "heading=1,paragraph=4" -> {"heading": 1, "paragraph": 4}
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown block kind: {kind}")
+        mix[kind] = int(weight)
+    return mix
+
+
+def count_html_nodes(node) -> int:
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, ParentNode):
+            stack.extend(node.children)
+    return count
+
+
+# Measures the heap cost of keeping parsed documents alive, as a search
+# indexer would: every TextNode from inline parsing plus every HTMLNode in
+# the block tree. Reported per node, including the node's strings.
+def bench_memory(documents: list[str], copies: int) -> dict:
+    documents = documents * copies
+
+    tracemalloc.start()
+    text_nodes = [
+        text_to_textnodes(block)
+        for document in documents
+        for block in markdown_to_blocks(document)
+        if not block.startswith("```")
+    ]
+    text_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    trees = [markdown_to_html_node(document) for document in documents]
+    tree_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    text_count = sum(len(nodes) for nodes in text_nodes)
+    tree_count = sum(count_html_nodes(tree) for tree in trees)
+    return {
+        "documents": len(documents),
+        "text_nodes": text_count,
+        "text_node_bytes": round(text_bytes / text_count, 1),
+        "html_nodes": tree_count,
+        "html_node_bytes": round(tree_bytes / tree_count, 1),
+    }
+
+
+# Times block classification alone over every block of the corpus. The
+# corpus mixes headings, paragraphs, quotes, code and both list kinds.
+def bench_classify(documents: list[str], copies: int) -> dict:
+    blocks = [
+        block for document in documents for block in markdown_to_blocks(document)
+    ] * copies
+
+    start = time.perf_counter()
+    for block in blocks:
+        block_to_block_type(block)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "blocks": len(blocks),
+        "seconds": round(elapsed, 4),
+        "blocks_per_second": round(len(blocks) / elapsed),
+    }
+
+
+def adversarial_paragraph(kind: str, count: int) -> str:
+    unit = ADVERSARIAL_UNITS[kind]
+    return "".join(unit.format(i=i) for i in range(count))
+
+
+# Times the inline parsing stages on single paragraphs of `kind` units at
+# doubling sizes up to max_count, and fits the growth of each stage as an
+# exponent: time ~ size ** exponent, so about 1.0 means the stage scales
+# linearly and 2.0 means it is quadratic in the paragraph length.
+def bench_adversarial(max_count: int, repeat: int) -> dict:
+    counts = [max(1, max_count >> shift) for shift in range(4, -1, -1)]
+    stages = {
+        "text_to_textnodes": text_to_textnodes,
+        "split_nodes_link": lambda text: split_nodes_link([TextNode(text, TextType.TEXT)]),
+        "split_nodes_image": lambda text: split_nodes_image([TextNode(text, TextType.TEXT)]),
+        "markdown_to_html_node": markdown_to_html_node,
+    }
+
+    results = {}
+    for kind in ADVERSARIAL_UNITS:
+        texts = [adversarial_paragraph(kind, count) for count in counts]
+        kind_result = {"sizes": [len(text) for text in texts]}
+        for name, fn in stages.items():
+            seconds = [_best_time(lambda: fn(text), repeat) for text in texts]
+            exponent = None
+            if seconds[0] > 0:
+                exponent = round(
+                    math.log(seconds[-1] / seconds[0])
+                    / math.log(len(texts[-1]) / len(texts[0])), 2)
+            kind_result[name] = {
+                "seconds": [round(t, 5) for t in seconds],
+                "exponent": exponent,
+            }
+        results[kind] = kind_result
+    return results
+
+
+# Runs fn `repeat` times and returns the fastest wall-clock time
+def _best_time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _rate(size: int, seconds: float) -> float:
+    return round(size / seconds, 2) if seconds > 0 else 0.0
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(peak * scale / (1024 * 1024), 1)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Times every pipeline stage over the documents in dir_path_content and then
+# a full generate_pages_recursive build of the same tree. Throughput is
+# reported in MB/s of markdown input (pages/s for the full build).
+def bench_suite(dir_path_content: str, template: Template, repeat: int) -> dict:
+    documents = load_corpus(dir_path_content)
+    size_mb = sum(len(document.encode()) for document in documents) / (1024 * 1024)
+    blocks = [block for document in documents for block in markdown_to_blocks(document)]
+    inline_blocks = [block for block in blocks if not block.startswith("```")]
+    trees = [markdown_to_html_node(document) for document in documents]
+
+    stages = {
+        "text_to_textnodes": lambda: [text_to_textnodes(block) for block in inline_blocks],
+        "markdown_to_blocks": lambda: [markdown_to_blocks(document) for document in documents],
+        "markdown_to_html_node": lambda: [markdown_to_html_node(document) for document in documents],
+        "to_html": lambda: [tree.to_html() for tree in trees],
+    }
+    results: dict[str, dict] = {}
+    for name, fn in stages.items():
+        seconds = _best_time(fn, repeat)
+        results[name] = {"seconds": round(seconds, 4), "mb_per_second": _rate(size_mb, seconds)}
+
+    # Every run builds into a new, empty directory: rebuilding into the
+    # previous run's output would skip every unchanged write, leaving the
+    # output I/O out of the measurement
+    seconds = float("inf")
+    with tempfile.TemporaryDirectory() as tmp_dir_path:
+        for run in range(repeat):
+            dest_dir_path = os.path.join(tmp_dir_path, str(run))
+            start = time.perf_counter()
+            generate_pages_recursive(dir_path_content, template, dest_dir_path)
+            seconds = min(seconds, time.perf_counter() - start)
+            shutil.rmtree(dest_dir_path)
+    results["generate_pages_recursive"] = {
+        "seconds": round(seconds, 4),
+        "mb_per_second": _rate(size_mb, seconds),
+        "pages_per_second": _rate(len(documents), seconds),
+    }
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pages": len(documents),
+        "input_mb": round(size_mb, 3),
+        "stages": results,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site generator.")
+    parser.add_argument("benchmark", choices=["suite", "corpus", "memory", "classify", "adversarial"])
+    parser.add_argument("--content",
+                        help="directory of markdown documents to use as the corpus "
+                             "(default: a synthetic corpus; ./content for memory/classify)")
+    parser.add_argument("--copies", type=int, default=200,
+                        help="how many times to repeat the corpus (memory/classify)")
+    parser.add_argument("--pages", type=int, default=200,
+                        help="number of pages in the synthetic corpus")
+    parser.add_argument("--blocks", type=int, default=30,
+                        help="number of blocks per synthetic page")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="block mix as kind=weight pairs, e.g. "
+                             "heading=1,paragraph=4,dense=2,code=1,quote=1,unordered=1,ordered=1")
+    parser.add_argument("--links", type=int, default=32000,
+                        help="largest number of links/images per paragraph (adversarial)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per stage; the fastest is reported")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    parser.add_argument("dest", nargs="?",
+                        help="directory to write the synthetic corpus to (corpus)")
+    args = parser.parse_args()
+
+    if args.benchmark == "corpus":
+        if args.dest is None:
+            parser.error("corpus needs a destination directory")
+        generate_corpus(args.dest, args.pages, args.blocks, args.mix, args.seed)
+        return
+
+    if args.benchmark == "suite":
+        with open(template_path) as f:
+            template = Template(f.read(), path=template_path)
+        if args.content is not None:
+            result = bench_suite(args.content, template, args.repeat)
+        else:
+            with tempfile.TemporaryDirectory() as corpus_dir:
+                generate_corpus(corpus_dir, args.pages, args.blocks, args.mix, args.seed)
+                result = bench_suite(corpus_dir, template, args.repeat)
+    elif args.benchmark == "adversarial":
+        result = bench_adversarial(args.links, args.repeat)
+    else:
+        documents = load_corpus(args.content or dir_path_content)
+        if args.benchmark == "memory":
+            result = bench_memory(documents, args.copies)
+        else:
+            result = bench_classify(documents, args.copies)
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
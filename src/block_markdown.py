@@ -1,11 +1,22 @@
 import re
+from collections.abc import Callable, Iterable, Iterator
 from enum import Enum
+from functools import lru_cache, partial
+from typing import TextIO
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, RewriteUrl
 from inline_markdown import text_to_textnodes
 from textnode import TextNode, text_node_to_html_node
 
 
+# Bump whenever the tree produced for a given markdown input changes, so
+# cached parse results from older versions are never reused
+PARSER_VERSION = "1"
+
+# Characters read at a time by read_chunks
+BLOCK_READ_SIZE = 64 * 1024
+
+
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
     HEADING = "heading"
@@ -25,88 +36,203 @@ def markdown_to_blocks(markdown: str):
     return filtered
 
 
+# Reads a text file in fixed-size chunks, for iter_blocks
+def read_chunks(file: TextIO, size: int = BLOCK_READ_SIZE) -> Iterator[str]:
+    return iter(partial(file.read, size), "")
+
+
+# Yields the same blocks as markdown_to_blocks("".join(chunks)), but lazily:
+# only the text since the last block boundary is held in memory. Chunks
+# without a boundary are kept as pieces and joined once, so a block far
+# larger than a chunk is still assembled in linear time.
+def iter_blocks(chunks: Iterable[str]) -> Iterator[str]:
+    pending: list[str] = []
+    # Last character of the pending text; a "\n\n" may straddle two chunks
+    last = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        pending.append(chunk)
+        if "\n\n" not in chunk and not (last == "\n" and chunk[0] == "\n"):
+            last = chunk[-1]
+            continue
+        # Splitting from the start of the pending text keeps str.split's
+        # left-to-right matching of runs of newlines
+        parts = "".join(pending).split("\n\n")
+        tail = parts.pop()
+        pending = [tail]
+        last = tail[-1:]
+        for part in parts:
+            block = part.strip()
+            if block:
+                yield block
+    block = "".join(pending).strip()
+    if block:
+        yield block
+
+
+# Compiled once at import; block classification runs for every block
+# and every line of a list block
+_HEADING_PATTERN = re.compile(r"^#{1,6}\s")
+_ORDERED_ITEM_PATTERN = re.compile(r"^\d+\.\s")
+
+
 def block_to_block_type(block: str) -> BlockType:
-    lines = block.split("\n")
+    # Dispatch on the first character: each block type has a distinct
+    # leading marker, so most paragraphs are classified by a single check
+    # and lines are only split for the block types that need them
+    first = block[:1]
 
     # Heading: 1 to 6 # characters followed by a space
-    if re.match(r"^#{1,6}\s", block):
-        return BlockType.HEADING
+    if first == "#":
+        if _HEADING_PATTERN.match(block):
+            return BlockType.HEADING
+        return BlockType.PARAGRAPH
 
     # Code: Starts and ends with 3 backticks
-    if block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
+    if first == "`":
+        if block.startswith("```") and block.endswith("```"):
+            return BlockType.CODE
+        return BlockType.PARAGRAPH
 
     # Quote: Every line must start with >
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
+    if first == ">":
+        if all(line.startswith(">") for line in block.split("\n")):
+            return BlockType.QUOTE
+        return BlockType.PARAGRAPH
 
     # Ordered List: Every line starts with a number followed by a period and space
-    if all(re.match(r"^\d+\.\s", line) for line in lines):
-        return BlockType.ORDERED_LIST
+    if first.isdecimal():
+        if all(_ORDERED_ITEM_PATTERN.match(line) for line in block.split("\n")):
+            return BlockType.ORDERED_LIST
+        return BlockType.PARAGRAPH
 
     # Unordered List: Every line starts with - followed by a space
-    if all(line.startswith("- ") for line in lines):
-        return BlockType.UNORDERED_LIST
+    if first == "-":
+        if all(line.startswith("- ") for line in block.split("\n")):
+            return BlockType.UNORDERED_LIST
+        return BlockType.PARAGRAPH
 
-    # 6. Default: Paragraph
+    # Default: Paragraph
     return BlockType.PARAGRAPH
 
 
 def markdown_to_html_node(markdown: str):
-    blocks = markdown_to_blocks(markdown)
-    child_nodes: list[ParentNode | LeafNode] = []
-
-    for block in blocks:
-        block_type = block_to_block_type(block)
-
-        match block_type:
-            case BlockType.PARAGRAPH:
-                node = ParentNode("p", text_to_children(block))
-                child_nodes.append(node)
-
-            case BlockType.HEADING:
-                # Count leading # characters to determine heading level
-                level = len(block) - len(block.lstrip("#"))
-                text = block[level + 1:]
-                node = ParentNode(f"h{level}", text_to_children(text))
-                child_nodes.append(node)
-
-            case BlockType.CODE:
-                # Strip the opening and closing ``` lines
-                inner = block.removeprefix("```").removesuffix("```").strip()
-                node = ParentNode("pre", [LeafNode("code", inner)])
-                child_nodes.append(node)
-
-            case BlockType.QUOTE:
-                lines = block.split("\n")
-                content = "\n".join(
-                    l.removeprefix(">").lstrip(" ") for l in lines
-                )
-                node = ParentNode("blockquote", text_to_children(content))
-                child_nodes.append(node)
-
-            case BlockType.ORDERED_LIST:
-                lines = block.split("\n")
-                # Each line becomes an <li> with its own inline formatting
-                new_lines = [re.sub(r"^\d+\.\s", "", l) for l in lines]
-                node = ParentNode(
-                    "ol", [ParentNode("li", text_to_children(l)) for l in new_lines])
-                child_nodes.append(node)
-
-            case BlockType.UNORDERED_LIST:
-                lines = block.split("\n")
-                # Each line becomes an <li> with its own inline formatting
-                new_lines = [l.removeprefix("- ") for l in lines]
-                node = ParentNode(
-                    "ul", [ParentNode("li", text_to_children(l)) for l in new_lines])
-                child_nodes.append(node)
-
-    return ParentNode("div", child_nodes)
+    return blocks_to_html_node(markdown_to_blocks(markdown))
+
+
+def blocks_to_html_node(blocks: Iterable[str]):
+    return ParentNode("div", [block_to_html_node(block) for block in blocks])
+
+
+def block_to_html_node(block: str) -> ParentNode:
+    block_type = block_to_block_type(block)
+
+    match block_type:
+        case BlockType.PARAGRAPH:
+            return ParentNode("p", text_to_children(block))
+
+        case BlockType.HEADING:
+            # Count leading # characters to determine heading level
+            level = len(block) - len(block.lstrip("#"))
+            text = block[level + 1:]
+            return ParentNode(f"h{level}", text_to_children(text))
+
+        case BlockType.CODE:
+            # Strip the opening and closing ``` lines
+            inner = block.removeprefix("```").removesuffix("```").strip()
+            return ParentNode("pre", [LeafNode("code", inner)])
+
+        case BlockType.QUOTE:
+            lines = block.split("\n")
+            content = "\n".join(
+                l.removeprefix(">").lstrip(" ") for l in lines
+            )
+            return ParentNode("blockquote", text_to_children(content))
+
+        case BlockType.ORDERED_LIST:
+            lines = block.split("\n")
+            # Each line becomes an <li> with its own inline formatting
+            new_lines = [_ORDERED_ITEM_PATTERN.sub("", l, count=1) for l in lines]
+            return ParentNode(
+                "ol", [ParentNode("li", text_to_children(l)) for l in new_lines])
+
+        case BlockType.UNORDERED_LIST:
+            lines = block.split("\n")
+            # Each line becomes an <li> with its own inline formatting
+            new_lines = [l.removeprefix("- ") for l in lines]
+            return ParentNode(
+                "ul", [ParentNode("li", text_to_children(l)) for l in new_lines])
+
+
+# Renders like markdown_to_html_node, but converts and writes one block at
+# a time, so the tree of only a single block is in memory at once. Stands in
+# for the content node in Template.write; it consumes the block iterator, so
+# it can only be written once. on_node is called with each block's node
+# (e.g. to collect its link URLs) before it is written.
+class StreamedDocument:
+    def __init__(
+        self,
+        blocks: Iterable[str],
+        on_node: Callable[[ParentNode], object] | None = None
+    ) -> None:
+        self.blocks = blocks
+        self.on_node = on_node
+
+    def write_html(self, write: Callable[[str], object], rewrite_url: RewriteUrl = None):
+        write("<div>")
+        for block in self.blocks:
+            node = block_to_html_node(block)
+            if self.on_node is not None:
+                self.on_node(node)
+            node.write_html(write, rewrite_url)
+        write("</div>")
 
 
 def text_to_children(text: str) -> list[ParentNode | LeafNode]:
+    if _inline_cache is not None:
+        # Each parent gets its own list; the nodes themselves are shared
+        return list(_inline_cache(text))
+    return _text_to_children(text)
+
+
+def _text_to_children(text: str) -> list[ParentNode | LeafNode]:
     text_nodes = text_to_textnodes(text)
     html_nodes: list[ParentNode | LeafNode] = list(
         map(text_node_to_html_node, text_nodes)
     )
     return html_nodes
+
+
+# Optional memo of text_to_children keyed by the exact inline text, for
+# corpora that repeat the same paragraphs, list items and footers across
+# pages. It is per process (lru_cache is thread-safe), so each build worker
+# keeps its own; see configure_inline_cache.
+_inline_cache = None
+
+
+# Enables a cache of the max_entries most recently used inline strings, or
+# disables it when max_entries is 0. Any previous cache and its counts are
+# dropped.
+def configure_inline_cache(max_entries: int):
+    global _inline_cache
+    _inline_cache = None
+    if max_entries > 0:
+        _inline_cache = lru_cache(maxsize=max_entries)(
+            lambda text: tuple(_text_to_children(text)))
+
+
+# Size the inline cache was configured with (0 when disabled), so worker
+# processes can be set up the same way
+def inline_cache_size() -> int:
+    if _inline_cache is None:
+        return 0
+    return _inline_cache.cache_parameters()["maxsize"]
+
+
+# (hits, misses) of the inline cache so far; (0, 0) when disabled
+def inline_cache_counts() -> tuple[int, int]:
+    if _inline_cache is None:
+        return 0, 0
+    info = _inline_cache.cache_info()
+    return info.hits, info.misses
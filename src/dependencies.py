@@ -0,0 +1,85 @@
+import os
+import posixpath
+from collections.abc import Container
+from urllib.parse import urlsplit
+
+from htmlnode import HTMLNode
+from urls import URL_PROPS
+
+
+# Returns every href/src value in a parsed page, i.e. the targets of the
+# links and images in its markdown
+def collect_urls(node: HTMLNode) -> set[str]:
+    urls: set[str] = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.props:
+            for key in URL_PROPS:
+                if key in node.props:
+                    urls.add(node.props[key])
+        if node.children:
+            stack.extend(node.children)
+    return urls
+
+
+# Site URL of an output file: "./docs/blog/tom/index.html" -> "/blog/tom/index.html"
+def output_url(dest_path: str, dest_dir_path: str) -> str:
+    return "/" + os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+
+
+# Maps a link or image URL found on the page at page_url to the output
+# file(s) it points at. External URLs and bare fragments map to nothing.
+# "/blog/tom" may be served by "blog/tom", "blog/tom/index.html" or
+# "blog/tom.html"; the first one in `outputs` wins, and when none exists
+# yet every candidate is returned, so creating the target later still
+# counts as a change the page depends on.
+def resolve_url(
+    url: str,
+    page_url: str,
+    dest_dir_path: str,
+    outputs: Container[str]
+) -> list[str]:
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return []
+    path = parts.path
+    is_dir = path.endswith("/")
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(page_url), path)
+    path = posixpath.normpath(path).strip("/")
+
+    base = os.path.join(dest_dir_path, *path.split("/")) if path else dest_dir_path
+    if is_dir or not path:
+        candidates = [os.path.join(base, "index.html")]
+    else:
+        candidates = [base, os.path.join(base, "index.html")]
+        if not posixpath.splitext(path)[1]:
+            candidates.append(base + ".html")
+
+    for candidate in candidates:
+        if candidate in outputs:
+            return [candidate]
+    return candidates
+
+
+# Output paths the page at dest_path depends on, from the URLs it links to.
+# Only non-page outputs are kept: a renamed fingerprinted asset is the one
+# output change that alters the pages pointing at it, and nothing a page
+# renders comes from the pages it links to. A URL with no output yet keeps
+# just its own path, where a later asset would be copied.
+def page_dependencies(
+    urls: set[str],
+    dest_path: str,
+    dest_dir_path: str,
+    outputs: Container[str],
+    pages: Container[str] = ()
+) -> list[str]:
+    page_url = output_url(dest_path, dest_dir_path)
+    deps: set[str] = set()
+    for url in urls:
+        targets = resolve_url(url, page_url, dest_dir_path, outputs)
+        if targets and targets[0] not in pages:
+            deps.add(targets[0])
+    deps.discard(dest_path)
+    return sorted(deps)
@@ -1,33 +1,192 @@
+import hashlib
+import io
+import logging
+import math
 import os
 import shutil
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+from typing import TextIO
 
-from block_markdown import markdown_to_html_node
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
 
+from block_markdown import (
+    StreamedDocument,
+    blocks_to_html_node,
+    configure_inline_cache,
+    inline_cache_counts,
+    inline_cache_size,
+    iter_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    read_chunks,
+)
+from dependencies import collect_urls, page_dependencies
+from fingerprint import AssetFingerprints
+from htmlnode import HTMLNode
+from manifest import BuildManifest, hash_file
+from output_writer import OutputWriter, make_output_dirs, stream_if_changed, write_if_changed
+from parse_cache import ParseCache
+from profiling import PROFILE_STAGES, BuildProfile, BuildStats
+from site_index import PAGE, SiteIndex, SourceFile, scan_sources
+from template import Template
 
-# Recursively copies all files and directories from src to dest.
-# Creates dest directories as needed; overwrites existing files.
-def copy_files_recursive(src_dir_path: str, dest_dir_path: str):
-    print(f"Source: {src_dir_path}, Destination: {dest_dir_path}")
+logger = logging.getLogger(__name__)
 
-    if not os.path.exists(src_dir_path):
-        raise NotADirectoryError(f"{src_dir_path} is not a valid directory")
+# Markdown files larger than this (in bytes) are converted block by block
+# and streamed to disk, so memory use doesn't grow with the file size
+STREAM_THRESHOLD = 8 * 1024 * 1024
+# Pages whose markdown is larger than this (in bytes) are rendered straight
+# into a temporary file rather than into memory for the OutputWriter
+BUFFERED_PAGE_LIMIT = 256 * 1024
 
-    # Create the destination directory if it doesn't exist yet;
-    # this handles both the top-level call and recursive subdirectory calls
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
 
-    for path in os.listdir(src_dir_path):
-        src_path = os.path.join(src_dir_path, path)
-        dest_path = os.path.join(dest_dir_path, path)
+# ioctl request number for FICLONE (share the source's extents) on Linux
+_FICLONE = 0x40049409
 
-        if os.path.isfile(src_path):
-            print(f" * {src_path} -> {dest_path}")
-            # shutil.copy preserves file content and permissions
-            shutil.copy(src_path, dest_path)
-        elif os.path.isdir(src_path):
-            # Recurse into subdirectory; the next call will create dest_path
-            copy_files_recursive(src_path, dest_path)
+COPY_STRATEGIES = ("auto", "hardlink", "copy_file_range", "reflink", "copy")
+
+
+def _copy_hardlink(src_path: str, dest_path: str):
+    os.link(src_path, dest_path)
+
+
+def _copy_file_range(src_path: str, dest_path: str):
+    if not hasattr(os, "copy_file_range"):
+        raise OSError("copy_file_range is not supported on this platform")
+    with open(src_path, "rb") as src_file, open(dest_path, "wb") as dest_file:
+        # In-kernel transfer: the bytes never pass through user space
+        while os.copy_file_range(src_file.fileno(), dest_file.fileno(), 1 << 30):
+            pass
+    shutil.copystat(src_path, dest_path)
+
+
+def _copy_reflink(src_path: str, dest_path: str):
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with open(src_path, "rb") as src_file, open(dest_path, "wb") as dest_file:
+        fcntl.ioctl(dest_file.fileno(), _FICLONE, src_file.fileno())
+    shutil.copystat(src_path, dest_path)
+
+
+_COPY_FUNCTIONS = {
+    "hardlink": _copy_hardlink,
+    "copy_file_range": _copy_file_range,
+    "reflink": _copy_reflink,
+}
+
+
+# Copies one file using the given strategy. "auto" tries a hardlink, then
+# copy_file_range, then a reflink; any strategy that isn't supported by the
+# platform or filesystem falls back to a plain shutil.copy2. Every strategy
+# leaves dest with the source's size and mtime, which the sync relies on.
+def copy_file(src_path: str, dest_path: str, strategy: str = "copy"):
+    if strategy not in COPY_STRATEGIES:
+        raise ValueError(f"unknown copy strategy: {strategy}")
+
+    # Never write through an existing dest: it may be a hardlink to a source
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+
+    if strategy == "auto":
+        attempts = ["hardlink", "copy_file_range", "reflink"]
+    elif strategy == "copy":
+        attempts = []
+    else:
+        attempts = [strategy]
+
+    for attempt in attempts:
+        try:
+            _COPY_FUNCTIONS[attempt](src_path, dest_path)
+            return
+        except OSError:
+            # Unsupported here (e.g. EXDEV across devices, EOPNOTSUPP);
+            # clear any partial output and try the next strategy
+            if os.path.lexists(dest_path):
+                os.remove(dest_path)
+
+    shutil.copy2(src_path, dest_path)
+
+
+# Recursively mirrors src into dest, copying only files that are new or
+# changed; see sync_files. Returns the number of files copied, so a
+# no-change rebuild copies nothing.
+def sync_files_recursive(
+    src_dir_path: str,
+    dest_dir_path: str,
+    manifest: BuildManifest | None = None,
+    checksum: bool = False,
+    strategy: str = "copy",
+    stats: BuildStats | None = None,
+    fingerprints: AssetFingerprints | None = None
+) -> int:
+    index = SiteIndex.scan(None, src_dir_path, dest_dir_path)
+    index.makedirs(dest_dir_path)
+    return sync_files(index, manifest, checksum, strategy, stats, fingerprints)
+
+
+# Copies the indexed static files that are new or changed. A file is
+# unchanged when the existing copy has the same size and mtime (copies keep
+# the source mtime); with checksum=True, files whose mtime differs are
+# compared by content hash before being re-copied. Both stats come from the
+# index, so an unchanged file costs no further syscalls.
+# Copied and confirmed files are recorded in the manifest, which lets it
+# prune outputs whose source has been deleted. Files are copied with
+# copy_file using the given strategy, under their fingerprinted names when
+# fingerprints are given. Returns the number of files copied.
+def sync_files(
+    index: SiteIndex,
+    manifest: BuildManifest | None = None,
+    checksum: bool = False,
+    strategy: str = "copy",
+    stats: BuildStats | None = None,
+    fingerprints: AssetFingerprints | None = None
+) -> int:
+    copied = 0
+    for source in index.assets:
+        dest_path = source.dest_path
+        if fingerprints is not None:
+            dest_path = os.path.join(
+                os.path.dirname(dest_path), fingerprints.file_name(source.path))
+
+        if not _asset_is_current(source, dest_path, index.output_stat(dest_path), checksum):
+            logger.debug(" * %s -> %s", source.path, dest_path)
+            index.makedirs(os.path.dirname(dest_path))
+            # Every copy strategy keeps the source mtime, which is what
+            # the next sync compares against
+            copy_file(source.path, dest_path, strategy)
+            copied += 1
+            if stats is not None:
+                stats.add_asset(source.size)
+        if manifest is not None:
+            manifest.record_asset(source.path, dest_path)
+
+    return copied
+
+
+def _asset_is_current(
+    source: SourceFile,
+    dest_path: str,
+    dest_stat: os.stat_result | None,
+    checksum: bool
+) -> bool:
+    if dest_stat is None:
+        return False
+    if source.size != dest_stat.st_size:
+        return False
+    if source.mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    if checksum and hash_file(source.path) == hash_file(dest_path):
+        # Same content: align the mtime so the next sync is a stat compare
+        shutil.copystat(source.path, dest_path)
+        return True
+    return False
 
 
 def extract_title(markdown: str):
@@ -39,48 +198,435 @@ def extract_title(markdown: str):
 
 
 # Reads a markdown file, converts it to HTML, injects the title and content
-# into the template, and writes the final HTML to dest_path.
-def generate_page(src_path: str, template_path: str, dest_path: str, basepath: str):
-    print(
-        f"Generating page from {src_path} to {dest_path} using {template_path}")
+# into the compiled template, and writes the final HTML to dest_path.
+# With a parse cache, unchanged markdown is loaded pre-parsed from the cache.
+# When a timings dict is given, the time spent in each stage is stored in it.
+# With a writer, the rendered page is handed to it instead of being written
+# here, and its directory must already exist (see make_output_dirs).
+# When a urls set is given, the page's link and image URLs are added to it.
+# Files over STREAM_THRESHOLD bypass the cache and the writer and are
+# streamed to disk (see _write_page_streamed); files over
+# BUFFERED_PAGE_LIMIT are parsed as usual but bypass the writer.
+# Returns the number of bytes written and the sha256 of the markdown the
+# page was built from, hashed as it was read.
+def generate_page(
+    src_path: str,
+    template: Template,
+    dest_path: str,
+    cache: ParseCache | None = None,
+    timings: dict[str, float] | None = None,
+    writer: OutputWriter | None = None,
+    urls: set[str] | None = None
+) -> tuple[int, str]:
+    logger.debug(
+        "Generating page from %s to %s using %s", src_path, dest_path, template.path)
+    return _generate_page(src_path, template, dest_path, cache, timings, writer, urls)
+
+
+# generate_page without the log line, for worker processes (whose progress
+# is logged by the parent)
+def _generate_page(
+    src_path: str,
+    template: Template,
+    dest_path: str,
+    cache: ParseCache | None = None,
+    timings: dict[str, float] | None = None,
+    writer: OutputWriter | None = None,
+    urls: set[str] | None = None
+) -> tuple[int, str]:
+    source = _HashingReader(src_path)
+    with io.TextIOWrapper(io.BufferedReader(source)) as src_file:
+        if timings is not None:
+            size = _write_page_profiled(
+                src_file, template, dest_path, cache, timings, urls, writer)
+        else:
+            size = _write_page(src_file, template, dest_path, cache, writer, urls)
+    return size, source.hexdigest()
+
+
+# Raw file reader that hashes the bytes as they are read. Every page path
+# reads its source to the end, so the digest is that of exactly the
+# markdown the page was built from, even if the file changes afterwards.
+class _HashingReader(io.RawIOBase):
+    def __init__(self, path: str) -> None:
+        self.file = open(path, "rb", buffering=0)
+        self.digest = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self.file.readinto(buffer)
+        if n:
+            self.digest.update(memoryview(buffer)[:n])
+        return n
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+# Builds one page from an open markdown file (see generate_page) and
+# returns the number of bytes written
+def _write_page(
+    src_file: TextIO,
+    template: Template,
+    dest_path: str,
+    cache: ParseCache | None = None,
+    writer: OutputWriter | None = None,
+    urls: set[str] | None = None
+) -> int:
+    src_size = os.fstat(src_file.fileno()).st_size
+    if src_size > STREAM_THRESHOLD:
+        return _write_page_streamed(src_file, template, dest_path, urls, writer)
+    markdown = src_file.read()
+    title, html_node = _parse_page(markdown, cache, urls)
 
-    with open(src_path) as src_file:
-        markdown = src_file.read()
-    with open(template_path) as template_file:
-        template = template_file.read()
+    if writer is not None and src_size > BUFFERED_PAGE_LIMIT:
+        # Too large to hold as a string (and again as bytes) for the writer;
+        # stream it from the tree into a temporary file instead
+        size, written = stream_if_changed(
+            dest_path, partial(template.write, title=title, content=html_node))
+        return _page_size(size, written, writer)
 
+    if writer is not None:
+        parts: list[str] = []
+        template.write(parts.append, title, html_node)
+        data = "".join(parts).encode()
+        writer.write(dest_path, data)
+        return len(data)
+
+    # Ensure the destination directory tree exists before writing
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    # Stream the rendered page straight into the file rather than building
+    # the full HTML string first
+    with open(dest_path, "w") as dest_file:
+        template.write(dest_file.write, title, html_node)
+        return dest_file.tell()
+
+
+# Size to return for a page written without going through the writer. A
+# page left unchanged on disk is still counted on the writer, like the pages
+# it writes itself (the caller counts the size, and the writer's unchanged
+# bytes are taken off it); with no writer it counts as 0 bytes written.
+def _page_size(size: int, written: bool, writer: OutputWriter | None) -> int:
+    if written:
+        return size
+    if writer is None:
+        return 0
+    writer.add_unchanged(size)
+    return size
+
+
+def _parse_page(
+    markdown: str,
+    cache: ParseCache | None = None,
+    urls: set[str] | None = None
+) -> tuple[str, HTMLNode]:
     # Extract the h1 title from raw markdown (before HTML conversion)
     title = extract_title(markdown)
-    html_node = markdown_to_html_node(markdown)
-    html_str = html_node.to_html()
-    # Chain replacements: inject title and content, then rewrite all
-    # absolute URL paths to include the basepath (for GitHub Pages deployment)
-    final = template.replace(
-        "{{ Title }}", title).replace(
-            "{{ Content }}", html_str).replace(
-                "href=\"/", f"href=\"{basepath}").replace(
-                    "src=\"/", f"src=\"{basepath}")
+    if cache is not None:
+        html_node = cache.parse(markdown)
+    else:
+        html_node = markdown_to_html_node(markdown)
+    if urls is not None:
+        urls.update(collect_urls(html_node))
+    return title, html_node
 
-    # Ensure the destination directory tree exists before writing
-    dest_dir_path = os.path.dirname(dest_path)
-    os.makedirs(dest_dir_path, exist_ok=True)
 
-    with open(dest_path, "w") as dest_file:
-        dest_file.write(final)
-
-
-# Recursively walks the content directory, converting each .md file
-# to an HTML page using the template, mirroring the directory structure in dest.
-def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str):
-    for path in os.listdir(dir_path_content):
-        src_path = os.path.join(dir_path_content, path)
-        # Swap .md extension to .html for the output filename
-        if path.endswith(".md"):
-            path = path.removesuffix(".md") + ".html"
-        dest_path = os.path.join(dest_dir_path, path)
-
-        if os.path.isfile(src_path):
-            generate_page(src_path, template_path, dest_path, basepath)
-        elif os.path.isdir(src_path):
-            generate_pages_recursive(
-                src_path, template_path, dest_path, basepath)
+# Converts an open markdown file one block at a time, writing each block's
+# HTML as soon as it is built, so neither the markdown, the tree nor the
+# page is ever held in memory as a whole. The page goes through
+# stream_if_changed, so an identical output is left untouched. Returns the
+# page size (see _page_size).
+def _write_page_streamed(
+    src_file: TextIO,
+    template: Template,
+    dest_path: str,
+    urls: set[str] | None = None,
+    writer: OutputWriter | None = None
+) -> int:
+    # The title is the first line, which is all extract_title looks at
+    first_line = src_file.readline()
+    title = extract_title(first_line)
+    on_node = None
+    if urls is not None:
+        on_node = lambda node: urls.update(collect_urls(node))
+    content = StreamedDocument(
+        iter_blocks(chain([first_line], read_chunks(src_file))), on_node)
+
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    size, written = stream_if_changed(
+        dest_path, partial(template.write, title=title, content=content))
+    return _page_size(size, written, writer)
+
+
+# Same output as generate_page, but each stage runs to completion on its own
+# (the page is rendered to a string before writing, instead of streamed) so
+# it can be timed separately. Seconds per stage are stored in timings. The
+# page is written here even when a writer is given, so the write is timed.
+def _write_page_profiled(
+    src_file: TextIO,
+    template: Template,
+    dest_path: str,
+    cache: ParseCache | None,
+    timings: dict[str, float],
+    urls: set[str] | None = None,
+    writer: OutputWriter | None = None
+) -> int:
+    timings.update(dict.fromkeys(PROFILE_STAGES, 0.0))
+    clock = time.perf_counter
+    start = clock()
+
+    markdown = src_file.read()
+    title = extract_title(markdown)
+    now = clock()
+    timings["read"], start = now - start, now
+
+    html_node = cache.get(markdown) if cache is not None else None
+    if html_node is None:
+        blocks = markdown_to_blocks(markdown)
+        now = clock()
+        timings["blocks"], start = now - start, now
+        html_node = blocks_to_html_node(blocks)
+        if cache is not None:
+            cache.put(markdown, html_node)
+    if urls is not None:
+        urls.update(collect_urls(html_node))
+    now = clock()
+    timings["parse"], start = now - start, now
+
+    html_str = html_node.to_html(template.rewrite_url)
+    now = clock()
+    timings["render"], start = now - start, now
+
+    final = template.render(title, html_str)
+    now = clock()
+    timings["template"], start = now - start, now
+
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    data = final.encode()
+    written = write_if_changed(dest_path, data)
+    timings["write"] = clock() - start
+    return _page_size(len(data), written, writer)
+
+
+# Returns (src_path, dest_path) pairs for every page in the content
+# directory, mirroring the directory structure in dest
+def collect_pages(dir_path_content: str, dest_dir_path: str) -> list[tuple[str, str]]:
+    return [
+        (source.path, source.dest_path)
+        for source in scan_sources(dir_path_content, dest_dir_path, PAGE)
+    ]
+
+
+# Converts each .md file in the content directory to an HTML page using the
+# template. When a manifest is given, pages whose source is unchanged since
+# the last build are skipped and every generated page is recorded in the
+# manifest. With jobs > 1 the pages are spread over a process pool. When a
+# profile is given, per-page stage timings are added to it; when stats are
+# given, every built page is counted. Pages are taken from the site index
+# when one is given, and the content directory is scanned otherwise.
+# Each recorded page lists the asset outputs its links and images point at;
+# a page whose source is unchanged is still rebuilt when one of those
+# outputs is in manifest.changed (see BuildManifest.dependents).
+def generate_pages_recursive(
+    dir_path_content: str,
+    template: Template,
+    dest_dir_path: str,
+    manifest: BuildManifest | None = None,
+    jobs: int = 1,
+    cache: ParseCache | None = None,
+    profile: BuildProfile | None = None,
+    stats: BuildStats | None = None,
+    index: SiteIndex | None = None
+):
+    if index is not None:
+        sources = index.pages
+    else:
+        sources = scan_sources(dir_path_content, dest_dir_path, PAGE)
+    resolve_deps = None
+    if manifest is not None:
+        pages_out = {source.dest_path for source in sources}
+        outputs = set(pages_out)
+        if index is not None:
+            outputs.update(source.dest_path for source in index.assets)
+        resolve_deps = partial(
+            page_dependencies, dest_dir_path=dest_dir_path, outputs=outputs,
+            pages=pages_out)
+
+        stale = {
+            source.dest_path for source in sources
+            if not manifest.is_fresh(
+                source.path, source.dest_path, (source.size, source.mtime_ns),
+                source.dest_path in index.outputs if index is not None else None)
+        }
+        # Pages whose rendered output changes with an output they link to
+        # (e.g. a fingerprinted image that was renamed). Nothing a page
+        # renders is read from the pages it links to, so editing a page
+        # never rebuilds the pages linking to it.
+        stale.update(manifest.dependents(manifest.changed))
+        sources = [source for source in sources if source.dest_path in stale]
+    pages = [(source.path, source.dest_path) for source in sources]
+    # Recorded in the manifest as-is, so built pages aren't stat'ed again
+    source_stats = {source.path: (source.size, source.mtime_ns) for source in sources}
+
+    # Every output directory is created once, up front
+    known_dirs = index.output_dirs if index is not None else set()
+    make_output_dirs((dest_path for _, dest_path in pages), known_dirs)
+
+    if jobs > 1 and len(pages) > 1:
+        generate_pages_parallel(
+            pages, template, jobs, manifest, cache, profile, stats, source_stats,
+            resolve_deps)
+        return
+
+    inline_before = inline_cache_counts()
+    with OutputWriter() as writer:
+        for src_path, dest_path in pages:
+            timings = {} if profile is not None else None
+            urls = set() if manifest is not None else None
+            size, digest = generate_page(
+                src_path, template, dest_path, cache, timings, writer, urls)
+            if profile is not None:
+                profile.add(src_path, timings)
+            if stats is not None:
+                stats.add_page(size)
+            if manifest is not None:
+                manifest.record(
+                    src_path, dest_path, source_stats[src_path],
+                    resolve_deps(urls, dest_path), digest)
+    if stats is not None:
+        stats.add_unchanged(writer.unchanged, writer.unchanged_bytes)
+        stats.add_inline_cache(*_counts_since(inline_before))
+
+
+# Inline cache (hits, misses) since an earlier inline_cache_counts()
+def _counts_since(before: tuple[int, int]) -> tuple[int, int]:
+    hits, misses = inline_cache_counts()
+    return hits - before[0], misses - before[1]
+
+
+# Runs in a worker process. Pages are generated in order and the batch stops
+# at the first failure, mirroring the serial loop; the number of pages that
+# succeeded is returned alongside the error (if any) instead of raising, so
+# the parent knows exactly which pages were written. The size and source
+# hash of each successful page are returned too, along with its stage timings when
+# profiling, and its link and image URLs when with_urls is set. Pages are
+# written through an OutputWriter, whose count (and size) of pages left
+# unchanged on disk is returned next; their directories are created by the
+# parent before the batches are dispatched. The worker's inline cache hits
+# and misses for the batch come next, and the number of entries it stored
+# in the parse cache last.
+def _generate_batch(
+    batch: list[tuple[str, str]],
+    template: Template,
+    cache: ParseCache | None = None,
+    profile: bool = False,
+    with_urls: bool = False
+) -> tuple[int, Exception | None, list[tuple[int, str]], list[dict[str, float]], list[set[str]], tuple[int, int], tuple[int, int], int]:
+    inline_before = inline_cache_counts()
+    stored_before = cache.stored if cache is not None else 0
+    built: list[tuple[int, str]] = []
+    all_timings: list[dict[str, float]] = []
+    all_urls: list[set[str]] = []
+    done, error = len(batch), None
+    try:
+        with OutputWriter() as writer:
+            for i, (src_path, dest_path) in enumerate(batch):
+                urls: set[str] | None = set() if with_urls else None
+                try:
+                    timings: dict[str, float] | None = {} if profile else None
+                    built.append(_generate_page(
+                        src_path, template, dest_path, cache, timings, writer, urls))
+                    if timings is not None:
+                        all_timings.append(timings)
+                except Exception as e:
+                    done, error = i, e
+                    break
+                if urls is not None:
+                    all_urls.append(urls)
+    except OSError as e:
+        # A write failed after its page was rendered; there's no telling
+        # which pages made it to disk, so none of the batch counts as done
+        stored = cache.stored - stored_before if cache is not None else 0
+        return 0, e, [], [], [], (0, 0), _counts_since(inline_before), stored
+    unchanged = (writer.unchanged, writer.unchanged_bytes)
+    stored = cache.stored - stored_before if cache is not None else 0
+    return done, error, built, all_timings, all_urls, unchanged, _counts_since(inline_before), stored
+
+
+# Generates pages across a pool of worker processes. Pages are submitted in
+# contiguous batches (a few per worker, to amortise inter-process overhead
+# while still balancing load) and results are consumed in submission order,
+# so progress output and the reported error match the serial path: the error
+# raised is always the one for the first failing page in walk order.
+# resolve_deps maps a page's URLs and output path to the outputs it depends
+# on, which are recorded in the manifest with the page. Workers get an inline
+# cache of the same size as this process, and their hit counts are added to
+# the stats.
+def generate_pages_parallel(
+    pages: list[tuple[str, str]],
+    template: Template,
+    jobs: int,
+    manifest: BuildManifest | None = None,
+    cache: ParseCache | None = None,
+    profile: BuildProfile | None = None,
+    stats: BuildStats | None = None,
+    source_stats: dict[str, tuple[int, int]] | None = None,
+    resolve_deps: Callable[[set[str], str], list[str]] | None = None
+):
+    source_stats = source_stats or {}
+    batch_size = max(1, min(64, math.ceil(len(pages) / (jobs * 4))))
+    batches = [
+        pages[i:i + batch_size] for i in range(0, len(pages), batch_size)
+    ]
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=configure_inline_cache,
+        initargs=(inline_cache_size(),)
+    ) as executor:
+        futures = [
+            executor.submit(
+                _generate_batch, batch, template, cache, profile is not None,
+                resolve_deps is not None)
+            for batch in batches
+        ]
+        for batch, future in zip(batches, futures):
+            done, error, built, all_timings, all_urls, unchanged, inline, stored = future.result()
+            if cache is not None:
+                cache.stored += stored
+            for i, (src_path, dest_path) in enumerate(batch[:done]):
+                size, digest = built[i]
+                logger.debug(
+                    "Generating page from %s to %s using %s",
+                    src_path, dest_path, template.path)
+                if profile is not None:
+                    profile.add(src_path, all_timings[i])
+                if stats is not None:
+                    stats.add_page(size)
+                if manifest is not None:
+                    deps = None
+                    if resolve_deps is not None:
+                        deps = resolve_deps(all_urls[i], dest_path)
+                    manifest.record(
+                        src_path, dest_path, source_stats.get(src_path), deps,
+                        digest)
+            if stats is not None:
+                stats.add_unchanged(*unchanged)
+                stats.add_inline_cache(*inline)
+            if error is not None:
+                src_path, dest_path = batch[done]
+                logger.debug(
+                    "Generating page from %s to %s using %s",
+                    src_path, dest_path, template.path)
+                # Drop the queued batches, but let the running ones finish
+                # so nothing is written after the error is raised
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise error
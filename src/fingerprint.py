@@ -0,0 +1,108 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+from output_writer import write_if_changed
+from site_index import ASSET, SourceFile, scan_sources
+
+# Hex digits of the content hash kept in a fingerprinted file name
+FINGERPRINT_LENGTH = 8
+
+# Files that must stay at a fixed URL, so they are never renamed
+UNFINGERPRINTED_NAMES = frozenset({"CNAME", ".nojekyll", "robots.txt", "favicon.ico"})
+
+# Threads hashing static files. Hashing and file reads release the GIL, so
+# this is sized for the CPU, independently of the page-generation processes
+HASH_THREADS = os.cpu_count() or 1
+
+
+# "index.css" + "3f9a1c2b..." -> "index.3f9a1c2b.css"
+def fingerprint_name(name: str, digest: str) -> str:
+    if name in UNFINGERPRINTED_NAMES:
+        return name
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+# Content hashes of every static file, used to copy each file under a
+# content-addressed name that can be served with immutable cache headers.
+# `files` maps each source path to its hash, size and mtime, and `urls` maps
+# each site-absolute URL ("/index.css") to its fingerprinted URL, which the
+# template's UrlRewriter applies to href/src props while rendering.
+class AssetFingerprints:
+    def __init__(self, src_dir_path: str, files: dict[str, dict[str, str | int]]) -> None:
+        self.src_dir_path = src_dir_path
+        self.files = files
+        self.urls: dict[str, str] = {}
+        for src_path, entry in files.items():
+            rel_path = os.path.relpath(src_path, src_dir_path)
+            url = "/" + rel_path.replace(os.sep, "/")
+            self.urls[url] = url[:url.rfind("/") + 1] + fingerprint_name(
+                os.path.basename(src_path), str(entry["hash"]))
+
+    # Hashes every file under src_dir_path (or the given already-indexed
+    # sources). Files whose size and mtime match an entry from the previous
+    # build reuse its hash; the rest are hashed on a pool of `threads`
+    # threads.
+    @classmethod
+    def scan(
+        cls,
+        src_dir_path: str,
+        previous: dict[str, dict[str, str | int]] | None = None,
+        threads: int = HASH_THREADS,
+        sources: list[SourceFile] | None = None
+    ) -> "AssetFingerprints":
+        previous = previous or {}
+        if sources is None:
+            sources = scan_sources(src_dir_path, src_dir_path, ASSET)
+        files: dict[str, dict[str, str | int]] = {}
+        stale: list[str] = []
+
+        for source in sources:
+            files[source.path] = {"size": source.size, "mtime_ns": source.mtime_ns}
+            known = previous.get(source.path)
+            if (known is not None and "hash" in known
+                    and known.get("size") == source.size
+                    and known.get("mtime_ns") == source.mtime_ns):
+                files[source.path]["hash"] = known["hash"]
+            else:
+                stale.append(source.path)
+
+        if threads > 1 and len(stale) > 1:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                digests = list(executor.map(hash_file, stale))
+        else:
+            digests = [hash_file(path) for path in stale]
+        for path, digest in zip(stale, digests):
+            files[path]["hash"] = digest
+
+        return cls(src_dir_path, files)
+
+    # Source paths whose fingerprinted name differs from the previous
+    # build's: new, edited and deleted files
+    def changed_since(self, previous: dict[str, dict[str, str | int]]) -> list[str]:
+        changed = [
+            src_path for src_path, entry in self.files.items()
+            if previous.get(src_path, {}).get("hash") != entry["hash"]
+        ]
+        changed.extend(src_path for src_path in previous if src_path not in self.files)
+        return sorted(changed)
+
+    # Output file name for a source file (the name only, not the directory)
+    def file_name(self, src_path: str) -> str:
+        entry = self.files.get(src_path)
+        if entry is None:
+            return os.path.basename(src_path)
+        return fingerprint_name(os.path.basename(src_path), str(entry["hash"]))
+
+    # Writes {"index.css": "index.3f9a1c2b.css", ...} for deploy tooling,
+    # e.g. to give the fingerprinted files long-lived cache headers. Like the
+    # pages, the file is left untouched when its content is unchanged.
+    # Returns whether it was written.
+    def save(self, path: str) -> bool:
+        data = {
+            url[1:]: fingerprinted[1:] for url, fingerprinted in self.urls.items()
+        }
+        return write_if_changed(
+            path, json.dumps(data, indent=2, sort_keys=True).encode())
@@ -2,77 +2,183 @@
 # (e.g. ParentNode | LeafNode in HTMLNode) resolve correctly
 from __future__ import annotations
 
+import html
+import re
+import sys
+from collections.abc import Callable, Mapping
+from types import MappingProxyType
+
+from urls import URL_PROPS
+
+# Optional callable applied to href/src values while rendering, e.g. a
+# UrlRewriter that prefixes the site's basepath
+RewriteUrl = Callable[[str], str] | None
+
+# Characters html.escape replaces; most attribute values (plain URLs and
+# alt text) contain none and are used as-is
+_ATTRIBUTE_ESCAPE_PATTERN = re.compile(r"[&<>\"']")
+
+
+def escape_attribute(value: str) -> str:
+    if _ATTRIBUTE_ESCAPE_PATTERN.search(value) is None:
+        return value
+    return html.escape(value)
+
 
 class HTMLNode:
+    # Fixed attribute slots instead of a per-instance __dict__; a parsed
+    # corpus holds millions of nodes, so this is most of its memory.
+    #
+    # _props_html caches the serialized attributes for _props_rewriter (see
+    # props_to_html).
+    __slots__ = ("tag", "value", "children", "_props", "_props_html", "_props_rewriter")
+
     def __init__(
         self,
         tag: str | None = None,
         value: str | None = None,
         children: list[ParentNode | LeafNode] | None = None,
-        props: dict[str, str] | None = None
+        props: Mapping[str, str] | None = None
     ) -> None:
-        self.tag = tag
+        # Tags come from a tiny vocabulary (p, li, h2, ...); interning makes
+        # generated ones like f"h{level}" share a single string object
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self):
+    @property
+    def props(self) -> Mapping[str, str] | None:
+        return self._props
+
+    # Props are kept as a read-only view of a private copy, so the only way
+    # to change them is to assign new ones, which drops the serialized
+    # attributes
+    @props.setter
+    def props(self, props: Mapping[str, str] | None):
+        self._props = MappingProxyType(dict(props)) if props is not None else None
+        self._props_html: str | None = None
+        self._props_rewriter: RewriteUrl = None
+
+    # The serialized attributes are never pickled (e.g. into the parse
+    # cache): they may hold the build's UrlRewriter
+    def __getstate__(self):
+        return None, {
+            "tag": self.tag, "value": self.value,
+            "children": self.children,
+            "props": dict(self._props) if self._props is not None else None,
+        }
+
+    def __setstate__(self, state):
+        for key, value in state[1].items():
+            setattr(self, key, value)
+
+    def to_html(self, rewrite_url: RewriteUrl = None):
         raise NotImplementedError()
 
-    def props_to_html(self):
+    # Streams the node's HTML to a write callable (e.g. list.append or a
+    # file's write method) instead of returning one big string
+    def write_html(self, write: Callable[[str], object], rewrite_url: RewriteUrl = None):
+        raise NotImplementedError()
+
+    def props_to_html(self, rewrite_url: RewriteUrl = None):
         # Each attribute is prefixed with a space so the result
         # can be inserted directly after the tag name: <tag {props}>
-        final = ""
-        if self.props == None:
-            return final
-        for key, val in self.props.items():
-            final += f' {key}="{val}"'
-        return final
+        if self._props == None:
+            return ""
+        # Serialized once per node and rewriter; a node rendered again (or
+        # shared between pages by the inline cache) reuses the string. Kept
+        # in two slots rather than a tuple: tuples are tracked by the cyclic
+        # GC, and millions of them make every collection walk the tree.
+        if self._props_html is not None and self._props_rewriter is rewrite_url:
+            return self._props_html
+        if rewrite_url is None:
+            props_html = "".join([
+                f' {key}="{escape_attribute(val)}"' for key, val in self._props.items()])
+        else:
+            # URLs are rewritten on the props themselves, so text that merely
+            # looks like an attribute (e.g. inside a code block) is never touched
+            props_html = "".join([
+                f' {key}="{escape_attribute(rewrite_url(val) if key in URL_PROPS else val)}"'
+                for key, val in self._props.items()
+            ])
+        self._props_html = props_html
+        self._props_rewriter = rewrite_url
+        return props_html
 
     def __repr__(self) -> str:
         return f"HTMLNode: \ntag={self.tag},\nvalue={self.value},\nchildren={self.children},\nprops={self.props}\n"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str | None,
         value: str,
-        props: dict[str, str] | None = None
+        props: Mapping[str, str] | None = None
     ) -> None:
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def to_html(self, rewrite_url: RewriteUrl = None):
         if self.value == None:
             raise ValueError("invalid HTML: all leaf nodes must have a value")
         if self.tag == None:
             return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html(rewrite_url)}>{self.value}</{self.tag}>"
+
+    def write_html(self, write: Callable[[str], object], rewrite_url: RewriteUrl = None):
+        write(self.to_html(rewrite_url))
 
     def __repr__(self) -> str:
         return f"HTMLNode: \ntag={self.tag},\nvalue={self.value},\nprops={self.props}\n"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str,
         children: list[ParentNode | LeafNode],
-        props: dict[str, str] | None = None
+        props: Mapping[str, str] | None = None
     ) -> None:
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self, rewrite_url: RewriteUrl = None):
+        # Collect fragments in a list and join once, so rendering is linear
+        # in the output size rather than re-copying child strings per level
+        parts: list[str] = []
+        self.write_html(parts.append, rewrite_url)
+        return "".join(parts)
+
+    def write_html(self, write: Callable[[str], object], rewrite_url: RewriteUrl = None):
+        # Iterative depth-first walk with an explicit stack of child
+        # iterators — supports arbitrary nesting of ParentNode and LeafNode
+        # without hitting the recursion limit on very deep trees
+        write(self._open_tag(rewrite_url))
+        stack = [(self, iter(self.children))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    write(child._open_tag(rewrite_url))
+                    stack.append((child, iter(child.children)))
+                    break
+                child.write_html(write, rewrite_url)
+            else:
+                # All children written; close this element
+                stack.pop()
+                write(f"</{node.tag}>")
+
+    def _open_tag(self, rewrite_url: RewriteUrl = None) -> str:
         if self.tag == None:
             raise ValueError("invalid HTML: all parent nodes must have a tag")
         if self.children == None:
             raise ValueError(
                 "invalid HTML: all parent nodes must have child nodes")
-        # Recursively render children — supports arbitrary nesting of ParentNode and LeafNode
-        child_html = ""
-        for child in self.children:
-            child_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{child_html}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html(rewrite_url)}>"
 
     def __repr__(self) -> str:
         return f"HTMLNode: \ntag={self.tag},\nvalue={self.value},\nprops={self.props}\n"
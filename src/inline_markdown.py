@@ -38,21 +38,34 @@ def split_nodes_delimiter(
     return new_nodes
 
 
+# Matches ![alt](url) — brackets/parens inside alt or url are excluded
+# to prevent greedy over-matching across multiple images.
+_IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# Matches [text](url) — the negative lookbehind (?<!!) ensures
+# image syntax ![alt](url) is not matched as a link
+_LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
-    # Matches ![alt](url) — brackets/parens inside alt or url are excluded
-    # to prevent greedy over-matching across multiple images.
     # Returns a list of tuples where each tuple is (alt_text, image_url).
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return _IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
-    # Matches [text](url) — the negative lookbehind (?<!!) ensures
-    # image syntax ![alt](url) is not matched as a link
     # Returns a list of tuples where each tuple is (anchor_text, link_url).
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return _LINK_PATTERN.findall(text)
 
 
-def split_nodes_image(old_nodes: list[TextNode]):
+# Splits every TEXT node around the matches of pattern, whose two groups
+# become the text and URL of a text_type node. The text between matches is
+# sliced by match offset in one finditer pass, so a node with k matches
+# costs O(n) instead of re-splitting (and re-copying) the rest of the text
+# once per match.
+def _split_nodes_pattern(
+    old_nodes: list[TextNode],
+    pattern: re.Pattern[str],
+    text_type: TextType
+) -> list[TextNode]:
     new_nodes: list[TextNode] = []
 
     for node in old_nodes:
@@ -61,73 +74,82 @@ def split_nodes_image(old_nodes: list[TextNode]):
             new_nodes.append(node)
             continue
 
-        images = extract_markdown_images(node.text)
-        if len(images) == 0:
-            new_nodes.append(node)
-            continue
-
-        rest_of_str: str = node.text
-
-        for img_alt, img_url in images:
-            # Progressively split the text around each image match,
-            # carrying forward the remainder after each split
-            parts = rest_of_str.split(f"![{img_alt}]({img_url})", 1)
-            left_str, rest_of_str = parts[0], parts[1]
-
+        text = node.text
+        pos = 0
+        for match in pattern.finditer(text):
             # Only append TextNodes with text to the final list
-            if left_str != "":
-                new_nodes.append(TextNode(left_str, TextType.TEXT))
-            new_nodes.append(TextNode(img_alt, TextType.IMAGE, img_url))
-
-        # Append the remaining part after processing all the images, provided it's non-empty
-        if rest_of_str != "":
-            new_nodes.append(TextNode(rest_of_str, TextType.TEXT))
-
-    return new_nodes
-
+            if match.start() > pos:
+                new_nodes.append(TextNode(text[pos:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = match.end()
 
-def split_nodes_link(old_nodes: list[TextNode]):
-    new_nodes: list[TextNode] = []
-
-    for node in old_nodes:
-        # Non-TEXT nodes are already typed — pass them through unchanged
-        if node.text_type is not TextType.TEXT:
+        if pos == 0:
+            # No matches: keep the node as it is
             new_nodes.append(node)
-            continue
-
-        links = extract_markdown_links(node.text)
-        if len(links) == 0:
-            new_nodes.append(node)
-            continue
+        elif pos < len(text):
+            # Append the remaining part after the last match
+            new_nodes.append(TextNode(text[pos:], TextType.TEXT))
 
-        rest_of_str: str = node.text
+    return new_nodes
 
-        for link_text, link_url in links:
-            # Progressively split the text around each link match,
-            # carrying forward the remainder after each split
-            parts = rest_of_str.split(f"[{link_text}]({link_url})", 1)
-            left_str, rest_of_str = parts[0], parts[1]
 
-            # Only append TextNodes with text to the final list
-            if left_str != "":
-                new_nodes.append(TextNode(left_str, TextType.TEXT))
-            new_nodes.append(TextNode(link_text, TextType.LINK, link_url))
+def split_nodes_image(old_nodes: list[TextNode]):
+    return _split_nodes_pattern(old_nodes, _IMAGE_PATTERN, TextType.IMAGE)
 
-        # Append the remaining part after processing all the images, provided it's non-empty
-        if rest_of_str != "":
-            new_nodes.append(TextNode(rest_of_str, TextType.TEXT))
 
-    return new_nodes
+def split_nodes_link(old_nodes: list[TextNode]):
+    return _split_nodes_pattern(old_nodes, _LINK_PATTERN, TextType.LINK)
+
+
+# One alternation covering every inline construct; at each position the
+# leftmost match wins, with alternatives tried in the order listed. The
+# (?<!!) lookbehind keeps a malformed image from being parsed as a link.
+# Link and image text is kept literal, since a LINK or IMAGE node holds
+# plain text: "[**Docs**](/docs)" is a link whose text is "**Docs**".
+_INLINE_PATTERN = re.compile(
+    r"\*\*(.*?)\*\*"                               # 1: bold
+    r"|_(.*?)_"                                    # 2: italic
+    r"|`(.*?)`"                                    # 3: code
+    r"|!\[([^\[\]]*)\]\(([^\(\)]*)\)"              # 4, 5: image alt, url
+    r"|(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)",        # 6, 7: link text, url
+    re.DOTALL,
+)
+
+_DELIMITER_TYPES = {1: TextType.BOLD, 2: TextType.ITALIC, 3: TextType.CODE}
+
+
+def _append_text(nodes: list[TextNode], text: str):
+    # Any delimiter left in plain text was never closed
+    for delimiter in ("**", "_", "`"):
+        if delimiter in text:
+            raise Exception(
+                f"invalid markdown: {delimiter} must have a corresponding closing {delimiter}")
+    nodes.append(TextNode(text, TextType.TEXT))
 
 
 def text_to_textnodes(text: str):
-    # Process delimiters first so inline formatting inside link/image
-    # text (e.g. [**bold**](url)) is resolved before those nodes
-    # get locked into LINK/IMAGE types
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    # Single left-to-right scan: every match of the combined pattern becomes
+    # one typed node and the text between matches becomes TEXT nodes, so no
+    # intermediate node lists are built and the text is never re-split
+    nodes: list[TextNode] = []
+    pos = 0
+
+    for match in _INLINE_PATTERN.finditer(text):
+        start = match.start()
+        if start > pos:
+            _append_text(nodes, text[pos:start])
+        pos = match.end()
+
+        index = match.lastindex
+        if index in _DELIMITER_TYPES:
+            # Empty spans (e.g. "****") produce no node, as before
+            if match.group(index) != "":
+                nodes.append(TextNode(match.group(index), _DELIMITER_TYPES[index]))
+        elif index == 5:
+            nodes.append(TextNode(match.group(4), TextType.IMAGE, match.group(5)))
+        else:
+            nodes.append(TextNode(match.group(6), TextType.LINK, match.group(7)))
+
+    if pos < len(text):
+        _append_text(nodes, text[pos:])
     return nodes
@@ -1,29 +1,239 @@
+import argparse
+import cProfile
+import logging
+import logging.handlers
 import os
 import shutil
 import sys
+from typing import TextIO
 
-from file_operations import copy_files_recursive, generate_pages_recursive
+from block_markdown import configure_inline_cache
+from file_operations import COPY_STRATEGIES, generate_pages_recursive, sync_files
+from fingerprint import AssetFingerprints
+from manifest import BuildManifest, build_config_key
+from parse_cache import ParseCache
+from profiling import BuildProfile, BuildStats
+from site_index import SiteIndex
+from template import Template
 
 dir_path_static = "./static"
 dir_path_public = "./docs"  # use "./public" for local testing
 dir_path_content = "./content"
 template_path = "./template.html"
+manifest_path = "./.build-manifest.json"
+parse_cache_path = "./.cache/parse"
+asset_manifest_name = "asset-manifest.json"
 
+logger = logging.getLogger(__name__)
 
-def main():
-    # Optional CLI arg for URL base path (e.g. "/repo-name/" for GitHub Pages)
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
 
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Build the static site from markdown content.")
+    # Optional positional URL base path (e.g. "/repo-name/" for GitHub Pages)
+    parser.add_argument("basepath", nargs="?", default="/")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--incremental", action="store_true",
+        help="only rebuild pages and copy static files whose source changed")
+    mode.add_argument(
+        "--clean", action="store_true",
+        help="delete the output directory before building; by default it is "
+             "kept and output files whose bytes are unchanged are not rewritten")
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, metavar="N",
+        help="generate pages across N worker processes (0 = one per CPU)")
+    parser.add_argument(
+        "--checksum", action="store_true",
+        help="compare static files by content hash when their mtime differs")
+    parser.add_argument(
+        "--copy-strategy", choices=COPY_STRATEGIES, default="copy",
+        help="how static files are copied; 'auto' tries hardlink, "
+             "copy_file_range and reflink before a plain copy")
+    parser.add_argument(
+        "--fingerprint", action="store_true",
+        help="copy static files under content-hashed names (index.3f9a1c2b.css) "
+             "and point page and template URLs at them")
+    parser.add_argument(
+        "--no-parse-cache", action="store_true",
+        help="always parse markdown instead of reusing cached parse trees")
+    parser.add_argument(
+        "--parse-cache-size", type=int, default=256, metavar="MB",
+        help="size cap of the parse cache; least recently used entries are evicted")
+    parser.add_argument(
+        "--inline-cache-size", type=int, default=0, metavar="N",
+        help="memoise the inline parse of the N most recently seen paragraphs, "
+             "headings and list items (per worker); the hit rate is reported "
+             "in the build summary")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="time each page generation stage and report the slowest pages")
+    parser.add_argument(
+        "--profile-top", type=int, default=10, metavar="N",
+        help="number of slowest pages to list with --profile")
+    parser.add_argument(
+        "--profile-dump", metavar="FILE",
+        help="also run the build under cProfile and write pstats data to FILE")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "--verbose", "-v", action="store_true",
+        help="log every generated page and copied file")
+    verbosity.add_argument(
+        "--quiet", "-q", action="store_true",
+        help="only log warnings and errors")
+    return parser
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
 
-    print("Generating pages...")
+# Collects records and writes them to stream in a single call once
+# `capacity` are queued, so -v on a large site doesn't cost one write per
+# page. A record at flush_level or above flushes straight away, so the
+# summary, warnings and errors (and watch mode's updates) are never held
+# back; logging flushes whatever is left at exit.
+class BufferedStreamHandler(logging.handlers.BufferingHandler):
+    def __init__(
+        self,
+        stream: TextIO,
+        capacity: int = 1024,
+        flush_level: int = logging.INFO
+    ) -> None:
+        super().__init__(capacity)
+        self.stream = stream
+        self.flush_level = flush_level
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.flush_level or super().shouldFlush(record)
+
+    def flush(self):
+        with self.lock:
+            if self.buffer:
+                self.stream.write(
+                    "".join(self.format(record) + "\n" for record in self.buffer))
+                self.stream.flush()
+                self.buffer.clear()
+
+
+# Logs go to stderr through a single buffered handler; per-file lines are
+# DEBUG so the default INFO level only shows the end-of-build summary.
+def configure_logging(args: argparse.Namespace):
+    if args.verbose:
+        level = logging.DEBUG
+    elif args.quiet:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    logging.basicConfig(
+        level=level, format="%(message)s",
+        handlers=[BufferedStreamHandler(sys.stderr)])
+
+
+def parse_cache_from_args(args: argparse.Namespace) -> ParseCache | None:
+    if args.no_parse_cache:
+        return None
+    return ParseCache(parse_cache_path, args.parse_cache_size * 1024 * 1024)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+
+# Runs one build and returns the compiled template and the saved manifest,
+# so callers such as watch mode can keep building on top of them.
+def build(args: argparse.Namespace) -> tuple[Template, BuildManifest]:
+    basepath = args.basepath
+    jobs = args.jobs or os.cpu_count() or 1
+    cache = parse_cache_from_args(args)
+    profile = BuildProfile() if args.profile else None
+    stats = BuildStats()
+    configure_inline_cache(args.inline_cache_size)
+
+    if args.clean:
+        logger.debug("Deleting public directory...")
+        if os.path.exists(dir_path_public):
+            shutil.rmtree(dir_path_public)
+
+    # One scandir pass over the sources and the existing output; the asset
+    # and page stages below take every stat they need from it
+    index = SiteIndex.scan(dir_path_content, dir_path_static, dir_path_public)
+
+    fingerprints = None
+    if args.fingerprint:
+        # Hashes from the previous build are reused for files whose size
+        # and mtime are unchanged, even when the output is rebuilt from scratch
+        previous = BuildManifest.load(manifest_path, "").fingerprints
+        fingerprints = AssetFingerprints.scan(
+            dir_path_static, previous, sources=index.assets)
+
+    # Load and compile the template once; every page renders from it
+    template = Template.load(
+        template_path, basepath, fingerprints.urls if fingerprints else None)
+    config_key = build_config_key(template)
+    if args.incremental:
+        manifest = BuildManifest.load(manifest_path, config_key)
+    else:
+        # A full build regenerates every page, but still writes a fresh
+        # manifest so the next incremental build can start from it
+        manifest = BuildManifest(manifest_path, config_key)
+
+    # A renamed asset changes every page that links to it
+    if fingerprints is not None:
+        renamed = fingerprints.changed_since(previous)
+    else:
+        # Turning --fingerprint off renames every fingerprinted asset back
+        renamed = list(manifest.fingerprints)
+        manifest.set_fingerprints({})
+    for src_path in renamed:
+        manifest.mark_changed(os.path.join(
+            dir_path_public, os.path.relpath(src_path, dir_path_static)))
+
+    logger.debug("Copying static files to public directory...")
+    index.makedirs(dir_path_public)
+    sync_files(
+        index, manifest, args.checksum, args.copy_strategy, stats, fingerprints)
+    if fingerprints is not None:
+        manifest.set_fingerprints(fingerprints.files)
+        asset_manifest_path = os.path.join(dir_path_public, asset_manifest_name)
+        fingerprints.save(asset_manifest_path)
+        # Recorded like an asset so a later build without --fingerprint
+        # prunes it
+        manifest.record_asset(dir_path_static, asset_manifest_path)
+
+    logger.debug("Generating pages...")
     generate_pages_recursive(
-        dir_path_content, template_path, dir_path_public, basepath)
+        dir_path_content, template, dir_path_public, manifest, jobs, cache,
+        profile, stats, index)
+
+    removed = manifest.prune()
+    if not args.incremental:
+        # The output directory is kept rather than wiped, so remove whatever
+        # this build didn't produce to end up with the same tree
+        removed += index.prune_outputs(manifest.seen)
+    for dest_path in removed:
+        logger.info("Removed stale output %s", dest_path)
+    manifest.save()
+    # Only new entries can push the cache past its size limit
+    if cache is not None and cache.stored:
+        cache.prune()
+    if profile is not None:
+        logger.info(profile.report(args.profile_top))
+    logger.info(stats.summary())
+    return template, manifest
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    configure_logging(args)
+    if args.profile_dump is None:
+        build(args)
+        return
+
+    # Function-level detail for the main process (worker processes started
+    # with --jobs are not included)
+    profiler = cProfile.Profile()
+    profiler.runcall(build, args)
+    profiler.dump_stats(args.profile_dump)
+    logger.info(
+        "Wrote cProfile stats to %s (inspect with: python3 -m pstats %s)",
+        args.profile_dump, args.profile_dump)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+
+from template import Template
+
+# Bump whenever the on-disk layout changes so stale manifests are discarded
+MANIFEST_VERSION = 2
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_config_key(template: Template) -> str:
+    # Anything that affects every page goes into the config key; when it
+    # changes, the whole manifest is invalidated and every page rebuilds.
+    # The template digest covers its URLs after rewriting, so renaming an
+    # asset the template references counts; other renamed assets only
+    # invalidate the pages that depend on them.
+    return f"{template.digest}:{template.basepath}"
+
+
+# Persistent record of which output pages were built from which sources.
+# Each entry stores the source's content hash plus its size and mtime, so
+# unchanged files are recognised with a single stat and only files whose
+# stat changed need to be re-hashed. Entries also list the asset outputs
+# the page links to or embeds ("deps"): when a fingerprinted asset is
+# renamed, the pages pointing at it are rebuilt too. Links between pages
+# aren't recorded, since editing a page never changes the pages linking to
+# it.
+class BuildManifest:
+    def __init__(self, path: str, config_key: str) -> None:
+        self.path = path
+        self.config_key = config_key
+        self.pages: dict[str, dict[str, str | int]] = {}
+        # Static asset outputs, mapped to the file they were copied from
+        self.assets: dict[str, str] = {}
+        # Static file content hashes for fingerprinting, with the size and
+        # mtime they were computed at, so unchanged files aren't re-hashed
+        self.fingerprints: dict[str, dict[str, str | int]] = {}
+        # Output paths produced or confirmed by the current build
+        self.seen: set[str] = set()
+        # Outputs whose change alters the pages that link to them, so their
+        # dependents must be rebuilt (see mark_changed)
+        self.changed: set[str] = set()
+        # Whether anything save() writes differs from the file on disk; a
+        # build that changes nothing leaves the manifest alone
+        self.dirty = True
+
+    @classmethod
+    def load(cls, path: str, config_key: str) -> "BuildManifest":
+        manifest = cls(path, config_key)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+
+        if data.get("version") == MANIFEST_VERSION:
+            manifest.config_key = data.get("config_key", "")
+            manifest.pages = data.get("pages", {})
+            # Assets don't depend on the template or basepath, so they stay
+            # valid across a config change
+            manifest.assets = data.get("assets", {})
+            manifest.fingerprints = data.get("fingerprints", {})
+            manifest.dirty = False
+        else:
+            # Unknown format: keep only the page output paths, for pruning
+            manifest.config_key = ""
+            manifest.pages = {
+                dest: {"src": entry["src"]}
+                for dest, entry in data.get("pages", {}).items()
+            }
+        manifest.set_config_key(config_key)
+        return manifest
+
+    # A different template/basepath means none of the recorded pages can be
+    # trusted; their output paths are kept around for pruning only
+    def set_config_key(self, config_key: str):
+        if config_key == self.config_key:
+            return
+        self.config_key = config_key
+        self.invalidate()
+
+    # Forces every page to be rebuilt while keeping the recorded output
+    # paths, so outputs of deleted sources are still pruned
+    def invalidate(self):
+        self.dirty = True
+        self.pages = {
+            dest: {"src": entry["src"]} for dest, entry in self.pages.items()
+        }
+
+    # The source's (size, mtime_ns) and whether the output exists can be
+    # passed in when already known (e.g. from a SiteIndex) to skip the stats
+    def is_fresh(
+        self,
+        src_path: str,
+        dest_path: str,
+        stat: tuple[int, int] | None = None,
+        dest_exists: bool | None = None
+    ) -> bool:
+        entry = self.pages.get(dest_path)
+        if entry is None or entry.get("src") != src_path or "hash" not in entry:
+            return False
+        if dest_exists is None:
+            dest_exists = os.path.exists(dest_path)
+        if not dest_exists:
+            return False
+
+        if stat is None:
+            src_stat = os.stat(src_path)
+            stat = (src_stat.st_size, src_stat.st_mtime_ns)
+        size, mtime_ns = stat
+        if entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+            self.seen.add(dest_path)
+            return True
+
+        # The file was touched; only a content change makes the page stale
+        if entry["size"] == size and entry["hash"] == hash_file(src_path):
+            entry["mtime_ns"] = mtime_ns
+            self.dirty = True
+            self.seen.add(dest_path)
+            return True
+        return False
+
+    # digest is the hash of the markdown the page was built from, and stat
+    # the source's (size, mtime_ns) from before it was read; pairing them
+    # means an edit made during the build still looks like a change next
+    # time. Either is taken from the file as it is now when not given.
+    def record(
+        self,
+        src_path: str,
+        dest_path: str,
+        stat: tuple[int, int] | None = None,
+        deps: list[str] | None = None,
+        digest: str | None = None
+    ):
+        if stat is None:
+            src_stat = os.stat(src_path)
+            stat = (src_stat.st_size, src_stat.st_mtime_ns)
+        entry = {
+            "src": src_path,
+            "hash": digest or hash_file(src_path),
+            "size": stat[0],
+            "mtime_ns": stat[1],
+            "deps": deps or [],
+        }
+        if self.pages.get(dest_path) != entry:
+            self.pages[dest_path] = entry
+            self.dirty = True
+        self.seen.add(dest_path)
+
+    def mark_changed(self, dest_path: str):
+        self.changed.add(dest_path)
+
+    # Pages that depend directly on any of the given outputs. Dependents of
+    # those pages aren't included: a page only reads from the pages it
+    # links to, and a dependent's own source didn't change.
+    def dependents(self, dest_paths: set[str]) -> set[str]:
+        return {
+            dest_path for dest_path, entry in self.pages.items()
+            if not dest_paths.isdisjoint(entry.get("deps", ()))
+        }
+
+    def record_asset(self, src_path: str, dest_path: str):
+        if self.assets.get(dest_path) != src_path:
+            self.assets[dest_path] = src_path
+            self.dirty = True
+        self.seen.add(dest_path)
+
+    def set_fingerprints(self, fingerprints: dict[str, dict[str, str | int]]):
+        if fingerprints != self.fingerprints:
+            self.fingerprints = fingerprints
+            self.dirty = True
+
+    # Removes a single output whose source was deleted and forgets it
+    def forget(self, dest_path: str):
+        if (self.pages.pop(dest_path, None) is not None
+                or self.assets.pop(dest_path, None) is not None):
+            self.dirty = True
+        self.seen.discard(dest_path)
+        if os.path.isfile(dest_path):
+            os.remove(dest_path)
+
+    # Removes outputs whose source no longer exists (i.e. pages and assets
+    # that were neither rebuilt nor confirmed in this build) and forgets them.
+    def prune(self) -> list[str]:
+        removed: list[str] = []
+        for outputs in (self.pages, self.assets):
+            for dest_path in list(outputs):
+                if dest_path in self.seen:
+                    continue
+                del outputs[dest_path]
+                self.dirty = True
+                if os.path.isfile(dest_path):
+                    os.remove(dest_path)
+                    removed.append(dest_path)
+        return removed
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = {
+            "version": MANIFEST_VERSION,
+            "config_key": self.config_key,
+            "pages": self.pages,
+            "assets": self.assets,
+            "fingerprints": self.fingerprints,
+        }
+        # Write to a temp file and rename so an interrupted build never
+        # leaves a truncated manifest behind
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            # json.dumps uses the C encoder; json.dump streams through the
+            # much slower pure-Python one
+            f.write(json.dumps(data, sort_keys=True))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
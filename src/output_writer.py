@@ -0,0 +1,150 @@
+import filecmp
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+
+# Threads writing output files; file I/O releases the GIL, so a handful of
+# threads overlap the open/write/close round-trips of many small pages
+WRITE_THREADS = 4
+# Bytes of rendered pages waiting to be written; write() blocks once this
+# much is queued, which bounds the memory held by pending pages however
+# large they are
+MAX_PENDING_BYTES = 16 * 1024 * 1024
+
+
+# Writes data to dest_path unless the file already holds exactly those
+# bytes; an unchanged file keeps its mtime, so rsync and object-storage
+# syncs don't re-upload it. Returns whether the file was written.
+def write_if_changed(dest_path: str, data: bytes) -> bool:
+    try:
+        with open(dest_path, "rb") as f:
+            # A size mismatch settles it without reading the file
+            if os.fstat(f.fileno()).st_size == len(data) and f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(dest_path, "wb") as f:
+        f.write(data)
+    return True
+
+
+# Like write_if_changed, but for a page too large to hold in memory: render
+# is called with a write callable and streams the page into a temporary file
+# next to dest_path, which only replaces dest_path when the bytes differ.
+# Returns the page size and whether dest_path was written.
+def stream_if_changed(
+    dest_path: str, render: Callable[[Callable[[str], object]], object]
+) -> tuple[int, bool]:
+    tmp_path = dest_path + ".tmp"
+    try:
+        with open(tmp_path, "w") as tmp_file:
+            render(tmp_file.write)
+            size = tmp_file.tell()
+        if os.path.isfile(dest_path) and filecmp.cmp(tmp_path, dest_path, shallow=False):
+            os.remove(tmp_path)
+            return size, False
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size, True
+
+
+# Creates every missing parent directory of dest_paths, each with a single
+# mkdir (parents first, so no os.makedirs probing of every ancestor), and
+# adds them to known_dirs. Returns the number of directories created.
+def make_output_dirs(dest_paths: Iterable[str], known_dirs: set[str]) -> int:
+    needed: set[str] = set()
+    for dest_path in dest_paths:
+        dir_path = os.path.dirname(dest_path)
+        while dir_path and dir_path not in known_dirs and dir_path not in needed:
+            needed.add(dir_path)
+            parent = os.path.dirname(dir_path)
+            if parent == dir_path:
+                break
+            dir_path = parent
+
+    created = 0
+    # A parent always sorts before its children
+    for dir_path in sorted(needed):
+        try:
+            os.mkdir(dir_path)
+            created += 1
+        except FileExistsError:
+            pass
+        known_dirs.add(dir_path)
+    return created
+
+
+# Writes rendered pages to disk through a thread pool, with at most
+# max_pending_bytes of pages queued at a time. Output directories are not
+# created per page: write() expects its directory to exist, and callers
+# create the whole set once up front with make_output_dirs. Pages whose
+# output file is already identical are left untouched and counted in
+# `unchanged` / `unchanged_bytes`. The first failed write is raised from
+# close() (or from the next write()), and leaving the `with` block waits
+# for every pending write.
+class OutputWriter:
+    def __init__(
+        self,
+        threads: int = WRITE_THREADS,
+        max_pending_bytes: int = MAX_PENDING_BYTES
+    ) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.max_pending_bytes = max_pending_bytes
+        self.pending_bytes = 0
+        self.error: BaseException | None = None
+        self.unchanged = 0
+        self.unchanged_bytes = 0
+        # Done callbacks run on the pool threads
+        self.lock = threading.Lock()
+        # Signalled whenever a pending write finishes
+        self.space = threading.Condition(self.lock)
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Already failing; wait for the writes but keep the first error
+            self.executor.shutdown(wait=True)
+
+    def write(self, dest_path: str, data: bytes):
+        if self.error is not None:
+            raise self.error
+        with self.space:
+            # A page larger than the whole budget still goes through, alone
+            self.space.wait_for(
+                lambda: self.pending_bytes == 0
+                or self.pending_bytes + len(data) <= self.max_pending_bytes)
+            self.pending_bytes += len(data)
+        future = self.executor.submit(write_if_changed, dest_path, data)
+        future.add_done_callback(partial(self._done, len(data)))
+
+    def _done(self, size: int, future: Future):
+        with self.space:
+            self.pending_bytes -= size
+            self.space.notify_all()
+            if future.exception() is not None:
+                if self.error is None:
+                    self.error = future.exception()
+            elif not future.result():
+                self.unchanged += 1
+                self.unchanged_bytes += size
+
+    # Counts a page found unchanged on disk by a write made outside write()
+    def add_unchanged(self, size: int):
+        with self.lock:
+            self.unchanged += 1
+            self.unchanged_bytes += size
+
+    # Waits for every pending write and raises the first failure
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import pickle
+
+from block_markdown import PARSER_VERSION, markdown_to_html_node
+from htmlnode import ParentNode
+
+
+# On-disk cache of parsed documents, keyed by a hash of the markdown source
+# and the parser version. The cached tree is independent of the template
+# and basepath, so changing either re-renders pages without re-parsing them.
+# Entries are files whose mtime is refreshed on every hit; prune() evicts
+# the least recently used entries once the cache grows past max_bytes.
+class ParseCache:
+    def __init__(self, dir_path: str, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.dir_path = dir_path
+        self.max_bytes = max_bytes
+        # Entries written by put() in this build (worker processes report
+        # theirs back); prune() has nothing to do while this is 0
+        self.stored = 0
+
+    def _entry_path(self, markdown: str) -> str:
+        digest = hashlib.sha256(
+            f"{PARSER_VERSION}\0{markdown}".encode()).hexdigest()
+        # Two-level layout keeps directories small on very large sites
+        return os.path.join(self.dir_path, digest[:2], digest)
+
+    def get(self, markdown: str) -> ParentNode | None:
+        path = self._entry_path(markdown)
+        try:
+            with open(path, "rb") as f:
+                node = pickle.load(f)
+            if not isinstance(node, ParentNode):
+                raise TypeError(f"cached entry is a {type(node).__name__}")
+            # Mark as recently used for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A corrupt entry, or one pickled from an older class layout,
+            # can fail in almost any way while loading; it is just a miss,
+            # and is removed so the next put() replaces it
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return node
+
+    def put(self, markdown: str, node: ParentNode):
+        path = self._entry_path(markdown)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name + rename, so concurrent workers never see (or
+        # produce) a partially written entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(node, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.stored += 1
+
+    # Returns the cached tree for markdown, parsing and storing it on a miss
+    def parse(self, markdown: str) -> ParentNode:
+        node = self.get(markdown)
+        if node is None:
+            node = markdown_to_html_node(markdown)
+            self.put(markdown, node)
+        return node
+
+    # Evicts least recently used entries until the cache fits in max_bytes.
+    # Returns the number of entries removed.
+    def prune(self) -> int:
+        entries: list[tuple[int, int, str]] = []
+        total = 0
+        if not os.path.isdir(self.dir_path):
+            return 0
+        with os.scandir(self.dir_path) as buckets:
+            for bucket in buckets:
+                if not bucket.is_dir():
+                    continue
+                with os.scandir(bucket.path) as files:
+                    for entry in files:
+                        stat = entry.stat()
+                        entries.append(
+                            (stat.st_mtime_ns, stat.st_size, entry.path))
+                        total += stat.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,100 @@
+import time
+
+# Stages of generate_page, in the order they run
+PROFILE_STAGES = ("read", "blocks", "parse", "render", "template", "write")
+
+
+# Collects per-page stage timings from a profiled build and summarises them:
+# cumulative time per stage, average per page, and the slowest pages.
+class BuildProfile:
+    def __init__(self) -> None:
+        self.pages: list[tuple[str, dict[str, float]]] = []
+
+    def add(self, src_path: str, timings: dict[str, float]):
+        self.pages.append((src_path, timings))
+
+    def totals(self) -> dict[str, float]:
+        totals = dict.fromkeys(PROFILE_STAGES, 0.0)
+        for _, timings in self.pages:
+            for stage, seconds in timings.items():
+                totals[stage] += seconds
+        return totals
+
+    def slowest(self, count: int) -> list[tuple[str, dict[str, float]]]:
+        return sorted(
+            self.pages, key=lambda page: sum(page[1].values()), reverse=True
+        )[:count]
+
+    def report(self, top: int = 10) -> str:
+        if not self.pages:
+            return "No pages were generated."
+
+        totals = self.totals()
+        total = sum(totals.values())
+        lines = [
+            f"Profiled {len(self.pages)} pages: {total:.3f}s total, "
+            f"{total / len(self.pages) * 1000:.2f} ms/page",
+            f"{'stage':<10} {'total (s)':>10} {'ms/page':>10} {'share':>7}",
+        ]
+        for stage in PROFILE_STAGES:
+            seconds = totals[stage]
+            share = seconds / total * 100 if total else 0.0
+            lines.append(
+                f"{stage:<10} {seconds:>10.3f} "
+                f"{seconds / len(self.pages) * 1000:>10.2f} {share:>6.1f}%")
+
+        lines.append(f"Slowest {min(top, len(self.pages))} pages:")
+        for src_path, timings in self.slowest(top):
+            # Name the stage that dominates, so outliers are easy to diagnose
+            worst = max(timings, key=timings.get)
+            lines.append(
+                f"  {sum(timings.values()) * 1000:9.2f} ms  {src_path} "
+                f"(mostly {worst}: {timings[worst] * 1000:.2f} ms)")
+        return "\n".join(lines)
+
+
+# Running totals for a build, reported as a one-line summary at the end
+class BuildStats:
+    def __init__(self) -> None:
+        self.pages_built = 0
+        # Built pages whose output file was already identical
+        self.pages_unchanged = 0
+        self.assets_copied = 0
+        self.bytes_written = 0
+        # Lookups in the inline parse cache (see configure_inline_cache)
+        self.inline_hits = 0
+        self.inline_misses = 0
+        self.started = time.perf_counter()
+
+    def add_page(self, size: int):
+        self.pages_built += 1
+        self.bytes_written += size
+
+    # Pages already counted by add_page that turned out not to need writing
+    def add_unchanged(self, count: int, size: int):
+        self.pages_unchanged += count
+        self.bytes_written -= size
+
+    def add_inline_cache(self, hits: int, misses: int):
+        self.inline_hits += hits
+        self.inline_misses += misses
+
+    def add_asset(self, size: int):
+        self.assets_copied += 1
+        self.bytes_written += size
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        unchanged = ""
+        if self.pages_unchanged:
+            unchanged = f" ({self.pages_unchanged} unchanged on disk)"
+        inline = ""
+        lookups = self.inline_hits + self.inline_misses
+        if lookups:
+            inline = (
+                f", inline cache hit rate {self.inline_hits / lookups * 100:.1f}% "
+                f"({self.inline_hits}/{lookups})")
+        return (
+            f"Built {self.pages_built} pages{unchanged}, copied {self.assets_copied} "
+            f"assets, wrote {self.bytes_written / (1024 * 1024):.2f} MB "
+            f"in {elapsed:.2f}s{inline}")
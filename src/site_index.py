@@ -0,0 +1,141 @@
+import os
+
+PAGE = "page"
+ASSET = "asset"
+
+
+# Swaps the .md extension to .html for the output filename
+def page_file_name(path: str) -> str:
+    if path.endswith(".md"):
+        return path.removesuffix(".md") + ".html"
+    return path
+
+
+# One source file found by the discovery pass, with the stat fields the
+# build needs and the output path it maps to
+class SourceFile:
+    __slots__ = ("path", "kind", "size", "mtime_ns", "dest_path")
+
+    def __init__(self, path: str, kind: str, size: int, mtime_ns: int, dest_path: str) -> None:
+        self.path = path
+        self.kind = kind
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.dest_path = dest_path
+
+    def __repr__(self) -> str:
+        return f"SourceFile({self.path}, {self.kind}, {self.size}, {self.mtime_ns}, {self.dest_path})"
+
+
+# Walks dir_path with os.scandir and returns every file below it, mapped to
+# its path under dest_dir_path. The entry type comes from the directory
+# listing itself, so each file costs exactly one stat (for size and mtime)
+# and directories cost none. Entries are sorted so the build order (and
+# therefore error reporting) is stable.
+def scan_sources(dir_path: str, dest_dir_path: str, kind: str) -> list[SourceFile]:
+    sources: list[SourceFile] = []
+    with os.scandir(dir_path) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+
+    for entry in entries:
+        if entry.is_dir():
+            sources.extend(scan_sources(
+                entry.path, os.path.join(dest_dir_path, entry.name), kind))
+        elif entry.is_file():
+            name = page_file_name(entry.name) if kind == PAGE else entry.name
+            stat = entry.stat()
+            sources.append(SourceFile(
+                entry.path, kind, stat.st_size, stat.st_mtime_ns,
+                os.path.join(dest_dir_path, name)))
+    return sources
+
+
+# Result of one discovery pass over a site: every page and asset source
+# with its output path, plus the files and directories that already exist
+# in the output directory. The page and asset stages read stats from here
+# instead of probing the filesystem again; existing outputs are listed
+# without a stat and only stat'ed (once, cached by the DirEntry) when a
+# stage needs their size or mtime.
+class SiteIndex:
+    def __init__(
+        self,
+        pages: list[SourceFile],
+        assets: list[SourceFile],
+        outputs: dict[str, os.DirEntry],
+        output_dirs: set[str]
+    ) -> None:
+        self.pages = pages
+        self.assets = assets
+        self.outputs = outputs
+        self.output_dirs = output_dirs
+
+    @classmethod
+    def scan(
+        cls,
+        dir_path_content: str | None,
+        dir_path_static: str | None,
+        dest_dir_path: str
+    ) -> "SiteIndex":
+        pages = []
+        if dir_path_content is not None:
+            if not os.path.isdir(dir_path_content):
+                raise NotADirectoryError(f"{dir_path_content} is not a valid directory")
+            pages = scan_sources(dir_path_content, dest_dir_path, PAGE)
+        assets = []
+        if dir_path_static is not None:
+            if not os.path.isdir(dir_path_static):
+                raise NotADirectoryError(f"{dir_path_static} is not a valid directory")
+            assets = scan_sources(dir_path_static, dest_dir_path, ASSET)
+
+        outputs: dict[str, os.DirEntry] = {}
+        output_dirs: set[str] = set()
+        if os.path.isdir(dest_dir_path):
+            output_dirs.add(dest_dir_path)
+            stack = [dest_dir_path]
+            while stack:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            output_dirs.add(entry.path)
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            outputs[entry.path] = entry
+        return cls(pages, assets, outputs, output_dirs)
+
+    def output_stat(self, dest_path: str) -> os.stat_result | None:
+        entry = self.outputs.get(dest_path)
+        return entry.stat() if entry is not None else None
+
+    # Removes every indexed output file that isn't in `keep`, plus any
+    # directory left empty by that, so the output ends up exactly as a
+    # build into an empty directory would. Returns the removed files.
+    def prune_outputs(self, keep: set[str]) -> list[str]:
+        removed: list[str] = []
+        dirs: set[str] = set()
+        for dest_path in self.outputs:
+            if dest_path in keep:
+                continue
+            try:
+                os.remove(dest_path)
+            except FileNotFoundError:
+                continue
+            removed.append(dest_path)
+            dirs.add(os.path.dirname(dest_path))
+
+        # Deepest first, so a parent is only tried once its children are gone
+        for dir_path in sorted(dirs, key=len, reverse=True):
+            while dir_path in self.output_dirs:
+                try:
+                    os.rmdir(dir_path)
+                except OSError:
+                    # Not empty (or already gone): its parents aren't either
+                    break
+                self.output_dirs.discard(dir_path)
+                dir_path = os.path.dirname(dir_path)
+        return sorted(removed)
+
+    # Creates dir_path unless the index already knows it exists
+    def makedirs(self, dir_path: str):
+        if dir_path not in self.output_dirs:
+            os.makedirs(dir_path, exist_ok=True)
+            self.output_dirs.add(dir_path)
@@ -0,0 +1,74 @@
+import hashlib
+import re
+from collections.abc import Callable
+
+from htmlnode import HTMLNode
+from urls import UrlRewriter
+
+TITLE_SLOT = "{{ Title }}"
+CONTENT_SLOT = "{{ Content }}"
+
+# Capturing group keeps the slot markers in the split output
+_SLOT_PATTERN = re.compile(r"(\{\{ Title \}\}|\{\{ Content \}\})")
+
+
+# A page template compiled once per build. The template text is split at its
+# slots up front, so rendering a page is a single join over the pre-split
+# fragments instead of a chain of str.replace passes over the whole page.
+class Template:
+    def __init__(
+        self,
+        text: str,
+        basepath: str = "/",
+        path: str | None = None,
+        assets: dict[str, str] | None = None
+    ) -> None:
+        self.path = path
+        self.basepath = basepath
+        # Fingerprinted asset URLs, see AssetFingerprints
+        self.assets = assets or {}
+        # Content URLs are rewritten on the node props while rendering; a
+        # basepath of "/" without fingerprinted assets needs no rewriting
+        self.rewrite_url = None
+        if basepath != "/" or self.assets:
+            self.rewrite_url = UrlRewriter(basepath, self.assets)
+        # Rewrite the template's own absolute URLs once here rather than on
+        # every rendered page
+        if self.rewrite_url is not None:
+            text = self.rewrite_url.rewrite_html(text)
+        # Taken after rewriting, so it changes when an asset the template
+        # references is renamed by fingerprinting
+        self.digest = hashlib.sha256(text.encode()).hexdigest()
+        # Even-indexed parts are literal text, odd-indexed parts are slots
+        self.parts = _SLOT_PATTERN.split(text)
+
+    @classmethod
+    def load(
+        cls, path: str, basepath: str = "/", assets: dict[str, str] | None = None
+    ) -> "Template":
+        with open(path) as template_file:
+            return cls(template_file.read(), basepath, path, assets)
+
+    # Joins the template around already-rendered content; render the content
+    # with to_html(template.rewrite_url) so its URLs match the basepath
+    def render(self, title: str, content: str) -> str:
+        values = {TITLE_SLOT: title, CONTENT_SLOT: content}
+        return "".join(
+            values[part] if i % 2 else part
+            for i, part in enumerate(self.parts)
+        )
+
+    # Streams the page to a write callable: template fragments are written
+    # as-is and the content node writes its HTML straight through, so the
+    # full page never exists as a single string in memory.
+    def write(self, write: Callable[[str], object], title: str, content: HTMLNode):
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                write(part)
+            elif part == TITLE_SLOT:
+                write(title)
+            else:
+                content.write_html(write, self.rewrite_url)
+
+    def __repr__(self) -> str:
+        return f"Template({self.path}, basepath={self.basepath})"
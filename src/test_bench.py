@@ -0,0 +1,46 @@
+import os
+import random
+import tempfile
+import unittest
+
+from bench import ADVERSARIAL_UNITS, DEFAULT_MIX, adversarial_paragraph, bench_adversarial, generate_corpus, generate_document, parse_mix
+from block_markdown import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def test_document_parses(self):
+        for seed in range(20):
+            document = generate_document(random.Random(seed), 40, DEFAULT_MIX)
+            self.assertTrue(markdown_to_html_node(document).to_html())
+
+    def test_document_covers_every_block_type(self):
+        document = generate_document(random.Random(0), 200, DEFAULT_MIX)
+        types = {block_to_block_type(block) for block in markdown_to_blocks(document)}
+        self.assertEqual(types, set(BlockType))
+
+    def test_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            generate_corpus(a, 3, seed=7)
+            generate_corpus(b, 3, seed=7)
+            path = os.path.join("section1", "page1", "index.md")
+            with open(os.path.join(a, path)) as fa, open(os.path.join(b, path)) as fb:
+                self.assertEqual(fa.read(), fb.read())
+
+    def test_adversarial_paragraphs_parse(self):
+        for kind in ADVERSARIAL_UNITS:
+            with self.subTest(kind=kind):
+                html = markdown_to_html_node(adversarial_paragraph(kind, 50)).to_html()
+                self.assertTrue(html.startswith("<div><p>"))
+
+    def test_adversarial_reports_every_stage(self):
+        result = bench_adversarial(64, repeat=1)
+        self.assertEqual(set(result), set(ADVERSARIAL_UNITS))
+        self.assertEqual(len(result["links"]["sizes"]), 5)
+        self.assertEqual(len(result["links"]["split_nodes_link"]["seconds"]), 5)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("heading=1,code=3"), {"heading": 1, "code": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
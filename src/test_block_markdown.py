@@ -1,6 +1,8 @@
 import unittest
 
-from block_markdown import markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node
+import io
+
+from block_markdown import StreamedDocument, configure_inline_cache, inline_cache_counts, inline_cache_size, iter_blocks, text_to_children, markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node, read_chunks
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -33,6 +35,82 @@ class TestMarkdownToBlocks(unittest.TestCase):
         self.assertEqual(result, [])
 
 
+class TestIterBlocks(unittest.TestCase):
+    CASES = [
+        "",
+        "hello world",
+        "block one\n\nblock two\n\nblock three",
+        "  hello  \n\n  world  ",
+        "hello\n\n\n\nworld",
+        "a\n\n\nb\n\n\n\n\nc\n",
+        "line one\nline two\n  \nstill one\n\nblock two",
+        "   \n\n   \n\n   ",
+    ]
+
+    def test_matches_markdown_to_blocks_for_any_chunk_size(self):
+        for markdown in self.CASES:
+            for size in (1, 2, 3, 5, 64):
+                with self.subTest(markdown=markdown, size=size):
+                    blocks = iter_blocks(read_chunks(io.StringIO(markdown), size))
+                    self.assertEqual(list(blocks), markdown_to_blocks(markdown))
+
+    def test_yields_blocks_before_reading_the_rest(self):
+        def chunks():
+            yield "first\n\nsec"
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(iter_blocks(chunks())), "first")
+
+    def test_streamed_document_matches_tree(self):
+        markdown = "# Title\n\nSome **bold** [link](/x)\n\n- a\n- b\n\n```\ncode\n```"
+        parts = []
+        nodes = []
+        StreamedDocument(iter_blocks([markdown]), nodes.append).write_html(parts.append)
+        self.assertEqual("".join(parts), markdown_to_html_node(markdown).to_html())
+        self.assertEqual(len(nodes), 4)
+
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        configure_inline_cache(0)
+
+    def test_disabled_by_default(self):
+        self.assertEqual(inline_cache_size(), 0)
+        text_to_children("**bold**")
+        self.assertEqual(inline_cache_counts(), (0, 0))
+
+    def test_repeated_text_hits(self):
+        configure_inline_cache(8)
+        markdown = "Same **footer**\n\n- item\n\nSame **footer**\n\n- item"
+        html = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(inline_cache_counts(), (2, 2))
+        configure_inline_cache(0)
+        self.assertEqual(markdown_to_html_node(markdown).to_html(), html)
+
+    def test_each_call_gets_its_own_list(self):
+        configure_inline_cache(8)
+        first = text_to_children("a [link](/x)")
+        second = text_to_children("a [link](/x)")
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        first.clear()
+        self.assertEqual(len(text_to_children("a [link](/x)")), 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        configure_inline_cache(2)
+        for text in ("a", "b", "a", "c", "a", "b"):
+            text_to_children(text)
+        # "b" was evicted by "c"; "a" stayed as the most recently used
+        self.assertEqual(inline_cache_counts(), (2, 4))
+
+    def test_reconfiguring_resets_counts(self):
+        configure_inline_cache(2)
+        text_to_children("a")
+        configure_inline_cache(4)
+        self.assertEqual(inline_cache_size(), 4)
+        self.assertEqual(inline_cache_counts(), (0, 0))
+
+
 class TestBlockToBlockType(unittest.TestCase):
     # headings
     def test_heading_h1(self):
@@ -0,0 +1,77 @@
+import os
+import unittest
+
+from dependencies import collect_urls, output_url, page_dependencies, resolve_url
+from htmlnode import LeafNode, ParentNode
+
+DEST = os.path.join(".", "docs")
+
+
+def out(*parts):
+    return os.path.join(DEST, *parts)
+
+
+class TestCollectUrls(unittest.TestCase):
+    def test_links_and_images(self):
+        node = ParentNode("div", [
+            ParentNode("p", [
+                LeafNode("a", "tom", {"href": "/blog/tom"}),
+                LeafNode("img", "", {"src": "/images/a.png", "alt": "a"}),
+            ]),
+            LeafNode("code", 'href="/not-a-link"'),
+        ])
+        self.assertEqual(collect_urls(node), {"/blog/tom", "/images/a.png"})
+
+
+class TestResolveUrl(unittest.TestCase):
+    def setUp(self):
+        self.outputs = {
+            out("index.html"),
+            out("blog", "tom", "index.html"),
+            out("images", "a.png"),
+        }
+
+    def resolve(self, url, page_url="/index.html"):
+        return resolve_url(url, page_url, DEST, self.outputs)
+
+    def test_output_url(self):
+        self.assertEqual(output_url(out("blog", "tom", "index.html"), DEST), "/blog/tom/index.html")
+
+    def test_directory_url(self):
+        self.assertEqual(self.resolve("/blog/tom"), [out("blog", "tom", "index.html")])
+        self.assertEqual(self.resolve("/blog/tom/"), [out("blog", "tom", "index.html")])
+        self.assertEqual(self.resolve("/"), [out("index.html")])
+
+    def test_file_url_with_fragment(self):
+        self.assertEqual(self.resolve("/images/a.png#x"), [out("images", "a.png")])
+
+    def test_relative_url(self):
+        self.assertEqual(
+            self.resolve("../../images/a.png", "/blog/tom/index.html"), [out("images", "a.png")])
+
+    def test_external_urls(self):
+        self.assertEqual(self.resolve("https://example.com/a"), [])
+        self.assertEqual(self.resolve("//cdn.com/a.js"), [])
+        self.assertEqual(self.resolve("#top"), [])
+
+    def test_missing_target_returns_every_candidate(self):
+        self.assertEqual(self.resolve("/blog/new"), [
+            out("blog", "new"), out("blog", "new", "index.html"), out("blog", "new.html")])
+
+    def test_page_dependencies_keep_only_assets(self):
+        pages = {out("index.html"), out("blog", "tom", "index.html")}
+        self.assertEqual(
+            page_dependencies(
+                {"/blog/tom", "/images/a.png", "/images/new.png", "/"},
+                out("index.html"), DEST, self.outputs, pages),
+            [out("images", "a.png"), out("images", "new.png")])
+
+    def test_page_dependencies_excludes_self(self):
+        dest = out("blog", "tom", "index.html")
+        self.assertEqual(
+            page_dependencies({"/blog/tom", "/", "https://x.com"}, dest, DEST, self.outputs),
+            [out("index.html")])
+
+
+if __name__ == "__main__":
+    unittest.main()
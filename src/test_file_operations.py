@@ -1,5 +1,18 @@
+import os
+import shutil
 import unittest
-from file_operations import extract_title
+from unittest import mock
+
+import file_operations
+from block_markdown import configure_inline_cache
+from file_operations import COPY_STRATEGIES, collect_pages, copy_file, extract_title, generate_pages_recursive, sync_files_recursive
+from fingerprint import AssetFingerprints
+from manifest import BuildManifest
+from parse_cache import ParseCache
+from profiling import BuildProfile, BuildStats
+from site_index import SiteIndex
+from temp_dir_test_case import TempDirTestCase
+from template import Template
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -37,5 +50,306 @@ class TestExtractTitle(unittest.TestCase):
             extract_title("Some text\n# Heading")
 
 
+class TestGeneratePages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "public")
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "a", "index.md"), "# A")
+        self.write(os.path.join(self.content, "b", "index.md"), "# B")
+
+    def build(self, jobs, stats=None):
+        error = None
+        with self.assertLogs("file_operations", level="DEBUG") as logs:
+            try:
+                generate_pages_recursive(
+                    self.content, self.template, self.dest, jobs=jobs,
+                    stats=stats)
+            except ValueError as e:
+                error = str(e)
+        return logs.output, error
+
+    def test_collect_pages_sorted(self):
+        pages = collect_pages(self.content, self.dest)
+        self.assertEqual(pages, [
+            (os.path.join(self.content, "a", "index.md"),
+             os.path.join(self.dest, "a", "index.html")),
+            (os.path.join(self.content, "b", "index.md"),
+             os.path.join(self.dest, "b", "index.html")),
+            (os.path.join(self.content, "index.md"),
+             os.path.join(self.dest, "index.html")),
+        ])
+
+    def test_parallel_matches_serial(self):
+        serial_log, _ = self.build(jobs=1)
+        serial = self.read(os.path.join(self.dest, "a", "index.html"))
+        parallel_log, _ = self.build(jobs=2)
+        parallel = self.read(os.path.join(self.dest, "a", "index.html"))
+        self.assertEqual(serial, "<title>A</title><div><h1>A</h1></div>")
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial_log, parallel_log)
+
+    def test_stats_count_pages_and_bytes(self):
+        serial, parallel = BuildStats(), BuildStats()
+        self.build(jobs=1, stats=serial)
+        shutil.rmtree(self.dest)
+        self.build(jobs=2, stats=parallel)
+        self.assertEqual(serial.pages_built, 3)
+        self.assertEqual(
+            serial.bytes_written,
+            sum(os.path.getsize(dest) for _, dest in collect_pages(self.content, self.dest)))
+        self.assertEqual(
+            (parallel.pages_built, parallel.bytes_written),
+            (serial.pages_built, serial.bytes_written))
+
+    def test_profiled_build_counts_unchanged_pages(self):
+        self.build(jobs=1)
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                stats = BuildStats()
+                with self.assertLogs("file_operations", level="DEBUG"):
+                    generate_pages_recursive(
+                        self.content, self.template, self.dest, jobs=jobs,
+                        profile=BuildProfile(), stats=stats)
+                self.assertEqual((stats.pages_unchanged, stats.bytes_written), (3, 0))
+                self.assertIn("Built 3 pages (3 unchanged on disk)", stats.summary())
+
+    def test_page_over_buffer_limit_bypasses_writer(self):
+        self.write(os.path.join(self.content, "index.md"), "# Big\n\n[a](/a) text")
+        dest = os.path.join(self.dest, "index.html")
+        self.build(jobs=1)
+        expected = self.read(dest)
+        os.remove(dest)
+        with mock.patch.object(file_operations, "BUFFERED_PAGE_LIMIT", 0):
+            self.build(jobs=1)
+            self.assertEqual(self.read(dest), expected)
+            os.utime(dest, ns=(1, 1))
+            self.build(jobs=1)
+        self.assertEqual(os.stat(dest).st_mtime_ns, 1)
+
+    def test_inline_cache_counts_from_every_worker(self):
+        for name in ("a", "b"):
+            self.write(
+                os.path.join(self.content, name, "index.md"),
+                f"# {name}\n\nShared **footer**\n\nShared **footer**")
+        self.addCleanup(configure_inline_cache, 0)
+        serial, parallel = BuildStats(), BuildStats()
+        configure_inline_cache(16)
+        self.build(jobs=1, stats=serial)
+        configure_inline_cache(16)
+        self.build(jobs=2, stats=parallel)
+        # Three headings and the first footer miss; in parallel each worker
+        # misses the footer once, but still hits it on the page's repeat
+        self.assertEqual((serial.inline_hits, serial.inline_misses), (3, 4))
+        self.assertEqual(parallel.inline_hits + parallel.inline_misses, 7)
+        self.assertGreaterEqual(parallel.inline_hits, 2)
+        self.assertIn("inline cache hit rate 42.9% (3/7)", serial.summary())
+
+    def test_parse_cache_stores_from_every_worker(self):
+        cache = ParseCache(os.path.join(self.root, "cache"))
+        generate_pages_recursive(
+            self.content, self.template, self.dest, jobs=2, cache=cache)
+        self.assertEqual(cache.stored, 3)
+
+    def test_identical_output_is_not_rewritten(self):
+        self.build(jobs=1)
+        dest = os.path.join(self.dest, "a", "index.html")
+        os.utime(dest, ns=(1, 1))
+        self.write(os.path.join(self.content, "b", "index.md"), "# B2")
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                stats = BuildStats()
+                self.build(jobs=jobs, stats=stats)
+                self.assertEqual(os.stat(dest).st_mtime_ns, 1)
+                self.assertEqual(stats.pages_built, 3)
+                self.assertGreaterEqual(stats.pages_unchanged, 2)
+                self.assertIn("unchanged on disk", stats.summary())
+
+    def test_large_page_is_streamed(self):
+        markdown = "# Big\n\n" + "\n\n".join(
+            f"para {i} with [a link](/a/{i})\n\n- item {i}" for i in range(50))
+        self.write(os.path.join(self.content, "index.md"), markdown)
+        dest = os.path.join(self.dest, "index.html")
+        self.build(jobs=1)
+        expected = self.read(dest)
+        os.remove(dest)
+
+        with mock.patch.object(file_operations, "STREAM_THRESHOLD", 0):
+            stats = BuildStats()
+            self.build(jobs=1, stats=stats)
+            self.assertEqual(self.read(dest), expected)
+            # The other pages were already identical on disk
+            self.assertEqual(stats.bytes_written, os.path.getsize(dest))
+            self.assertEqual(stats.pages_unchanged, 2)
+            os.utime(dest, ns=(1, 1))
+            self.build(jobs=1)
+        # Identical output is left untouched and no temporary file remains
+        self.assertEqual(os.stat(dest).st_mtime_ns, 1)
+        self.assertEqual(sorted(os.listdir(self.dest)), ["a", "b", "index.html"])
+
+    def test_indexed_build_skips_fresh_pages(self):
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"), "key")
+        index = SiteIndex.scan(self.content, None, self.dest)
+        stats = BuildStats()
+        generate_pages_recursive(
+            self.content, self.template, self.dest, manifest, stats=stats, index=index)
+        self.assertEqual(stats.pages_built, 3)
+
+        self.write(os.path.join(self.content, "a", "index.md"), "# A2")
+        index = SiteIndex.scan(self.content, None, self.dest)
+        stats = BuildStats()
+        generate_pages_recursive(
+            self.content, self.template, self.dest, manifest, stats=stats, index=index)
+        self.assertEqual(stats.pages_built, 1)
+
+    def test_edit_during_build_is_rebuilt_next_time(self):
+        src = os.path.join(self.content, "a", "index.md")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"), "key")
+        parse_page = file_operations._parse_page
+
+        def parse_then_edit(markdown, *args):
+            if markdown == "# A":
+                # Same size, so only the content hash can tell
+                self.write(src, "# Z")
+            return parse_page(markdown, *args)
+
+        with mock.patch.object(file_operations, "_parse_page", parse_then_edit):
+            generate_pages_recursive(self.content, self.template, self.dest, manifest)
+        stats = BuildStats()
+        generate_pages_recursive(
+            self.content, self.template, self.dest, manifest, stats=stats)
+        self.assertEqual(stats.pages_built, 1)
+        self.assertIn("Z", self.read(os.path.join(self.dest, "a", "index.html")))
+
+    def test_linked_page_change_rebuilds_only_that_page(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[A](/a)")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"), "key")
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                generate_pages_recursive(
+                    self.content, self.template, self.dest, manifest, jobs=jobs)
+                self.write(os.path.join(self.content, "a", "index.md"), f"# A{jobs}")
+                stats = BuildStats()
+                generate_pages_recursive(
+                    self.content, self.template, self.dest, manifest, jobs=jobs,
+                    stats=stats)
+                # The home page links to a/ but renders nothing from it, so
+                # the link isn't even recorded
+                self.assertEqual(stats.pages_built, 1)
+                self.assertEqual(
+                    manifest.pages[os.path.join(self.dest, "index.html")]["deps"], [])
+
+    def test_changed_asset_rebuilds_dependents(self):
+        self.write(
+            os.path.join(self.content, "index.md"),
+            "# Home\n\n[A](/a) ![logo](/images/logo.png) [out](https://x.com)")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"), "key")
+        generate_pages_recursive(self.content, self.template, self.dest, manifest)
+        logo = os.path.join(self.dest, "images", "logo.png")
+        self.assertEqual(manifest.pages[os.path.join(self.dest, "index.html")]["deps"], [logo])
+        # As main does for a renamed fingerprinted asset
+        manifest.mark_changed(logo)
+        stats = BuildStats()
+        generate_pages_recursive(
+            self.content, self.template, self.dest, manifest, stats=stats)
+        self.assertEqual(stats.pages_built, 1)
+        self.assertTrue(manifest.is_fresh(
+            os.path.join(self.content, "index.md"), os.path.join(self.dest, "index.html")))
+
+    def test_parallel_reports_first_error(self):
+        self.write(os.path.join(self.content, "a", "index.md"), "no title")
+        self.write(os.path.join(self.content, "b", "index.md"), "no title")
+        serial = self.build(jobs=1)
+        parallel = self.build(jobs=2)
+        self.assertIsNotNone(serial[1])
+        self.assertEqual(serial, parallel)
+
+
+class TestSyncFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "public")
+        self.manifest = os.path.join(self.root, "manifest.json")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def sync(self, checksum=False):
+        manifest = BuildManifest.load(self.manifest, "key")
+        copied = sync_files_recursive(
+            self.static, self.dest, manifest, checksum)
+        removed = manifest.prune()
+        manifest.save()
+        return copied, removed
+
+    def test_first_sync_copies_everything(self):
+        self.assertEqual(self.sync(), (2, []))
+        with open(os.path.join(self.dest, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png")
+
+    def test_unchanged_sync_copies_nothing(self):
+        self.sync()
+        self.assertEqual(self.sync(), (0, []))
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual(self.sync(), (1, []))
+
+    def test_touched_file_skipped_with_checksum(self):
+        self.sync()
+        os.utime(os.path.join(self.static, "index.css"), ns=(1, 1))
+        self.assertEqual(self.sync(checksum=True), (0, []))
+        self.assertEqual(self.sync(), (0, []))
+
+    def test_deleted_source_is_removed(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        dest = os.path.join(self.dest, "images", "a.png")
+        self.assertEqual(self.sync(), (0, [dest]))
+        self.assertFalse(os.path.exists(dest))
+
+    def test_fingerprinted_sync_uses_hashed_names(self):
+        fingerprints = AssetFingerprints.scan(self.static)
+        manifest = BuildManifest.load(self.manifest, "key")
+        self.assertEqual(sync_files_recursive(
+            self.static, self.dest, manifest, fingerprints=fingerprints), 2)
+        name = fingerprints.urls["/images/a.png"][1:]
+        with open(os.path.join(self.dest, name)) as f:
+            self.assertEqual(f.read(), "png")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "a.png")))
+
+    def test_every_copy_strategy_preserves_content_and_mtime(self):
+        src = os.path.join(self.static, "index.css")
+        for strategy in COPY_STRATEGIES:
+            with self.subTest(strategy=strategy):
+                dest = os.path.join(self.root, f"{strategy}.css")
+                copy_file(src, dest, strategy)
+                with open(dest) as f:
+                    self.assertEqual(f.read(), "body {}")
+                self.assertEqual(
+                    os.stat(dest).st_mtime_ns, os.stat(src).st_mtime_ns)
+
+    def test_copy_replaces_hardlinked_dest(self):
+        src = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.root, "out.css")
+        copy_file(src, dest, "hardlink")
+        other = os.path.join(self.static, "images", "a.png")
+        copy_file(other, dest, "copy")
+        with open(src) as f:
+            self.assertEqual(f.read(), "body {}")
+
+    def test_unknown_copy_strategy_raises(self):
+        with self.assertRaises(ValueError):
+            copy_file(os.path.join(self.static, "index.css"),
+                      os.path.join(self.root, "x"), "teleport")
+
+    def test_missing_source_raises(self):
+        with self.assertRaises(NotADirectoryError):
+            sync_files_recursive(os.path.join(self.root, "nope"), self.dest)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import unittest
+
+from fingerprint import AssetFingerprints, fingerprint_name
+from manifest import hash_file
+from temp_dir_test_case import TempDirTestCase
+
+
+class TestFingerprintName(unittest.TestCase):
+    def test_hash_goes_before_extension(self):
+        self.assertEqual(
+            fingerprint_name("index.css", "3f9a1c2b0000"), "index.3f9a1c2b.css")
+
+    def test_name_without_extension(self):
+        self.assertEqual(fingerprint_name("LICENSE", "3f9a1c2b0000"), "LICENSE.3f9a1c2b")
+
+    def test_fixed_names_are_kept(self):
+        self.assertEqual(fingerprint_name("robots.txt", "3f9a1c2b0000"), "robots.txt")
+
+
+class TestAssetFingerprints(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.css = os.path.join(self.static, "index.css")
+        self.png = os.path.join(self.static, "images", "a.png")
+        self.write(self.css, "body {}")
+        self.write(self.png, "png")
+
+    def test_urls_map_to_content_hashed_names(self):
+        fingerprints = AssetFingerprints.scan(self.static)
+        css_hash = hash_file(self.css)[:8]
+        png_hash = hash_file(self.png)[:8]
+        self.assertEqual(fingerprints.urls, {
+            "/index.css": f"/index.{css_hash}.css",
+            "/images/a.png": f"/images/a.{png_hash}.png",
+        })
+        self.assertEqual(fingerprints.file_name(self.png), f"a.{png_hash}.png")
+
+    def test_parallel_scan_matches_serial(self):
+        self.assertEqual(
+            AssetFingerprints.scan(self.static, threads=1).files,
+            AssetFingerprints.scan(self.static).files)
+
+    def test_unchanged_file_reuses_previous_hash(self):
+        previous = AssetFingerprints.scan(self.static).files
+        previous[self.css] = dict(previous[self.css], hash="cafebabe" * 8)
+        fingerprints = AssetFingerprints.scan(self.static, previous)
+        self.assertEqual(fingerprints.files[self.css]["hash"], "cafebabe" * 8)
+
+    def test_changed_file_is_rehashed(self):
+        previous = AssetFingerprints.scan(self.static).files
+        self.write(self.css, "body { margin: 0 }")
+        fingerprints = AssetFingerprints.scan(self.static, previous)
+        self.assertEqual(fingerprints.files[self.css]["hash"], hash_file(self.css))
+
+    def test_save_writes_relative_names(self):
+        fingerprints = AssetFingerprints.scan(self.static)
+        path = os.path.join(self.root, "asset-manifest.json")
+        fingerprints.save(path)
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(data["index.css"], fingerprints.urls["/index.css"][1:])
+
+    def test_unchanged_asset_manifest_is_not_rewritten(self):
+        path = os.path.join(self.root, "asset-manifest.json")
+        self.assertTrue(AssetFingerprints.scan(self.static).save(path))
+        os.utime(path, ns=(1, 1))
+        self.assertFalse(AssetFingerprints.scan(self.static).save(path))
+        self.assertEqual(os.stat(path).st_mtime_ns, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
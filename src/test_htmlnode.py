@@ -1,3 +1,5 @@
+import pickle
+import sys
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -20,6 +22,10 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(node.children, [child])
         self.assertEqual(node.props, {"class": "main"})
 
+    def test_no_instance_dict(self):
+        for node in (HTMLNode(), LeafNode("p", "x"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
     # to_html
     def test_to_html_raises(self):
         node = HTMLNode()
@@ -42,6 +48,62 @@ class TestHTMLNode(unittest.TestCase):
         self.assertIn(' href="https://example.com"', result)
         self.assertIn(' target="_blank"', result)
 
+    def test_props_to_html_rewrites_url_props_only(self):
+        node = HTMLNode(props={"href": "/a", "src": "/b", "title": "/c"})
+        self.assertEqual(
+            node.props_to_html(lambda url: "/base" + url),
+            ' href="/base/a" src="/base/b" title="/c"')
+
+    def test_props_to_html_escapes_values(self):
+        node = HTMLNode(props={"href": "/a?x=1&y=\"2\"", "alt": "<Tom's>"})
+        self.assertEqual(
+            node.props_to_html(),
+            ' href="/a?x=1&amp;y=&quot;2&quot;" alt="&lt;Tom&#x27;s&gt;"')
+
+    def test_props_to_html_escapes_rewritten_urls(self):
+        node = HTMLNode(props={"href": "/a"})
+        self.assertEqual(
+            node.props_to_html(lambda url: url + "?v=1&w=2"), ' href="/a?v=1&amp;w=2"')
+
+    def test_props_to_html_is_cached_per_rewriter(self):
+        calls = []
+
+        def rewrite(url):
+            calls.append(url)
+            return "/base" + url
+
+        node = HTMLNode(props={"href": "/a"})
+        self.assertEqual(node.props_to_html(rewrite), ' href="/base/a"')
+        self.assertEqual(node.props_to_html(rewrite), ' href="/base/a"')
+        self.assertEqual(calls, ["/a"])
+        self.assertEqual(node.props_to_html(), ' href="/a"')
+        self.assertEqual(node.props_to_html(lambda url: "/other" + url), ' href="/other/a"')
+
+    def test_assigning_props_invalidates_cache(self):
+        node = HTMLNode(props={"href": "/a"})
+        node.props_to_html()
+        node.props = {"href": "/b"}
+        self.assertEqual(node.props_to_html(), ' href="/b"')
+        node.props = None
+        self.assertEqual(node.props_to_html(), "")
+
+    def test_props_cannot_change_in_place(self):
+        props = {"href": "/a"}
+        node = LeafNode("a", "x", props)
+        self.assertEqual(node.to_html(), '<a href="/a">x</a>')
+        with self.assertRaises(TypeError):
+            node.props["href"] = "/b"
+        # The node keeps its own copy of the dict it was given
+        props["href"] = "/c"
+        self.assertEqual(node.to_html(), '<a href="/a">x</a>')
+
+    def test_pickle_drops_cached_props(self):
+        node = LeafNode("a", "x", {"href": "/a"})
+        node.props_to_html(lambda url: "/base" + url)
+        copy = pickle.loads(pickle.dumps(node))
+        self.assertEqual(copy.props, {"href": "/a"})
+        self.assertEqual(copy.to_html(), '<a href="/a">x</a>')
+
     # __repr__
     def test_repr(self):
         node = HTMLNode("p", "hello", None, {"class": "intro"})
@@ -144,6 +206,37 @@ class TestParentNode(unittest.TestCase):
                           "class": "container"})
         self.assertEqual(node.to_html(), '<div class="container">text</div>')
 
+    def test_to_html_siblings_after_nested_parent(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "a")]),
+            LeafNode("b", "b"),
+            ParentNode("p", [LeafNode(None, "c")]),
+        ])
+        self.assertEqual(
+            node.to_html(), "<div><p>a</p><b>b</b><p>c</p></div>")
+
+    def test_to_html_beyond_recursion_limit(self):
+        node = LeafNode(None, "x")
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 1 + len("<span></span>") *
+                         sys.getrecursionlimit() * 2)
+
+    def test_to_html_nested_no_tag_raises(self):
+        inner = ParentNode("p", [LeafNode(None, "text")])
+        inner.tag = None
+        with self.assertRaises(ValueError):
+            ParentNode("div", [inner]).to_html()
+
+    # write_html
+    def test_write_html_streams_fragments(self):
+        node = ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, "!")])
+        parts = []
+        node.write_html(parts.append)
+        self.assertEqual(parts, ["<p>", "<b>bold</b>", "!", "</p>"])
+
     def test_to_html_no_tag_raises(self):
         node = ParentNode("div", [LeafNode(None, "text")])
         node.tag = None
@@ -258,6 +258,29 @@ class TestSplitNodesLink(unittest.TestCase):
             TextNode("bold", TextType.BOLD),
         ])
 
+    def test_repeated_identical_links(self):
+        nodes = split_nodes_link([TextNode("[a](/x), [a](/x)", TextType.TEXT)])
+        self.assertEqual(nodes, [
+            TextNode("a", TextType.LINK, "/x"),
+            TextNode(", ", TextType.TEXT),
+            TextNode("a", TextType.LINK, "/x"),
+        ])
+
+    def test_link_identical_to_earlier_image(self):
+        # The image's "[a](/x)" must not be taken for the link that follows
+        nodes = split_nodes_link([TextNode("![a](/x) then [a](/x)", TextType.TEXT)])
+        self.assertEqual(nodes, [
+            TextNode("![a](/x) then ", TextType.TEXT),
+            TextNode("a", TextType.LINK, "/x"),
+        ])
+
+    def test_many_links_in_one_node(self):
+        text = "".join(f"[{i}](/{i}) " for i in range(1000))
+        nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(nodes), 2000)
+        self.assertEqual(nodes[-2], TextNode("999", TextType.LINK, "/999"))
+        self.assertEqual(nodes[-1], TextNode(" ", TextType.TEXT))
+
 
 class TestTextToTextnodes(unittest.TestCase):
     def test_plain_text(self):
@@ -320,6 +343,47 @@ class TestTextToTextnodes(unittest.TestCase):
             TextNode("link", TextType.LINK, "https://example.com"),
         ])
 
+    def test_delimiters_inside_code_are_literal(self):
+        nodes = text_to_textnodes("run `a_b ** c` now")
+        self.assertEqual(nodes, [
+            TextNode("run ", TextType.TEXT),
+            TextNode("a_b ** c", TextType.CODE),
+            TextNode(" now", TextType.TEXT),
+        ])
+
+    def test_link_url_with_underscores(self):
+        nodes = text_to_textnodes("see [docs](https://a.com/snake_case_page)")
+        self.assertEqual(nodes, [
+            TextNode("see ", TextType.TEXT),
+            TextNode("docs", TextType.LINK, "https://a.com/snake_case_page"),
+        ])
+
+    def test_delimiters_inside_link_and_image_text_are_literal(self):
+        nodes = text_to_textnodes(
+            "see [**Docs**](/docs), [_x_](/x), [`y`](/y) and ![**a**](/a.png)")
+        self.assertEqual(nodes, [
+            TextNode("see ", TextType.TEXT),
+            TextNode("**Docs**", TextType.LINK, "/docs"),
+            TextNode(", ", TextType.TEXT),
+            TextNode("_x_", TextType.LINK, "/x"),
+            TextNode(", ", TextType.TEXT),
+            TextNode("`y`", TextType.LINK, "/y"),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("**a**", TextType.IMAGE, "/a.png"),
+        ])
+
+    def test_empty_delimited_span_dropped(self):
+        nodes = text_to_textnodes("a****b")
+        self.assertEqual(nodes, [
+            TextNode("a", TextType.TEXT),
+            TextNode("b", TextType.TEXT),
+        ])
+
+    def test_unmatched_delimiter_raises(self):
+        for text in ("hello **world", "hello _world", "hello `world"):
+            with self.assertRaises(Exception):
+                text_to_textnodes(text)
+
 
 if __name__ == "__main__":
     unittest.main()
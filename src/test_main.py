@@ -0,0 +1,49 @@
+import io
+import logging
+import unittest
+
+from main import BufferedStreamHandler
+
+
+class CountingStream(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+class TestBufferedStreamHandler(unittest.TestCase):
+    def setUp(self):
+        self.stream = CountingStream()
+        self.handler = BufferedStreamHandler(self.stream, capacity=3)
+        self.logger = logging.getLogger("test_main")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def test_debug_records_are_written_together(self):
+        self.logger.debug("a")
+        self.logger.debug("b")
+        self.assertEqual(self.stream.getvalue(), "")
+        self.logger.debug("c")
+        self.assertEqual(self.stream.getvalue(), "a\nb\nc\n")
+        self.assertEqual(self.stream.writes, 1)
+
+    def test_info_flushes_immediately_and_in_order(self):
+        self.logger.debug("page")
+        self.logger.info("summary")
+        self.assertEqual(self.stream.getvalue(), "page\nsummary\n")
+        self.assertEqual(self.stream.writes, 1)
+
+    def test_close_flushes_the_rest(self):
+        self.logger.debug("page")
+        self.handler.close()
+        self.assertEqual(self.stream.getvalue(), "page\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
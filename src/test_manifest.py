@@ -0,0 +1,116 @@
+import os
+import unittest
+
+from manifest import BuildManifest, build_config_key
+from temp_dir_test_case import TempDirTestCase
+from template import Template
+
+
+class TestBuildManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.root, "page.md")
+        self.dest = os.path.join(self.root, "page.html")
+        self.path = os.path.join(self.root, "manifest.json")
+        self.write(self.src, "# Title")
+        self.write(self.dest, "<html></html>")
+
+    def test_unknown_page_is_stale(self):
+        manifest = BuildManifest(self.path, "key")
+        self.assertFalse(manifest.is_fresh(self.src, self.dest))
+
+    def test_recorded_page_is_fresh_after_reload(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.record(self.src, self.dest)
+        manifest.save()
+        loaded = BuildManifest.load(self.path, "key")
+        self.assertTrue(loaded.is_fresh(self.src, self.dest))
+
+    def test_content_change_is_stale(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.record(self.src, self.dest)
+        self.write(self.src, "# Other")
+        self.assertFalse(manifest.is_fresh(self.src, self.dest))
+
+    def test_touch_without_change_is_fresh(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.record(self.src, self.dest)
+        os.utime(self.src, ns=(1, 1))
+        self.assertTrue(manifest.is_fresh(self.src, self.dest))
+
+    def test_missing_output_is_stale(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.record(self.src, self.dest)
+        os.remove(self.dest)
+        self.assertFalse(manifest.is_fresh(self.src, self.dest))
+
+    def test_unchanged_manifest_is_not_rewritten(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.record(self.src, self.dest)
+        manifest.save()
+        os.utime(self.path, ns=(1, 1))
+        loaded = BuildManifest.load(self.path, "key")
+        self.assertTrue(loaded.is_fresh(self.src, self.dest))
+        loaded.record(self.src, self.dest)
+        loaded.save()
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1)
+
+        self.write(self.src, "# Other")
+        loaded.record(self.src, self.dest)
+        loaded.save()
+        self.assertNotEqual(os.stat(self.path).st_mtime_ns, 1)
+
+    def test_config_change_invalidates(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.record(self.src, self.dest)
+        manifest.save()
+        loaded = BuildManifest.load(self.path, "other-key")
+        self.assertFalse(loaded.is_fresh(self.src, self.dest))
+
+    def test_invalidate_keeps_outputs_for_pruning(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.record(self.src, self.dest)
+        manifest.invalidate()
+        self.assertFalse(manifest.is_fresh(self.src, self.dest))
+        manifest.seen.clear()
+        self.assertEqual(manifest.prune(), [self.dest])
+
+    def test_fingerprints_survive_config_change(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.set_fingerprints({self.src: {"hash": "abc", "size": 1, "mtime_ns": 1}})
+        manifest.save()
+        loaded = BuildManifest.load(self.path, "other-key")
+        self.assertEqual(loaded.fingerprints, manifest.fingerprints)
+
+    def test_config_key_tracks_assets_the_template_references(self):
+        text = '<link href="/a.css">{{ Content }}'
+        plain = build_config_key(Template(text))
+        one = build_config_key(Template(text, assets={"/a.css": "/a.1.css"}))
+        two = build_config_key(Template(text, assets={"/a.css": "/a.2.css"}))
+        self.assertEqual(len({plain, one, two}), 3)
+        # Other assets only invalidate the pages that link to them
+        other = build_config_key(
+            Template(text, assets={"/a.css": "/a.1.css", "/b.png": "/b.1.png"}))
+        self.assertEqual(one, other)
+
+    def test_dependents(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.record(self.src, self.dest, deps=["other.html"])
+        self.assertEqual(manifest.dependents({"other.html"}), {self.dest})
+        self.assertEqual(manifest.dependents({"unrelated.html"}), set())
+        manifest.save()
+        loaded = BuildManifest.load(self.path, "key")
+        self.assertEqual(loaded.dependents({"other.html"}), {self.dest})
+
+    def test_prune_removes_unseen_outputs(self):
+        manifest = BuildManifest(self.path, "key")
+        manifest.record(self.src, self.dest)
+        manifest.save()
+        loaded = BuildManifest.load(self.path, "key")
+        self.assertEqual(loaded.prune(), [self.dest])
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertEqual(loaded.pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from output_writer import OutputWriter, make_output_dirs, stream_if_changed, write_if_changed
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_make_output_dirs_creates_each_directory_once(self):
+        paths = [
+            os.path.join(self.dest, "blog", "a", "index.html"),
+            os.path.join(self.dest, "blog", "b", "index.html"),
+            os.path.join(self.dest, "blog", "b", "other.html"),
+            os.path.join(self.dest, "index.html"),
+        ]
+        known = {self.dest}
+        self.assertEqual(make_output_dirs(paths, known), 3)
+        self.assertTrue(os.path.isdir(os.path.join(self.dest, "blog", "b")))
+        self.assertEqual(make_output_dirs(paths, known), 0)
+
+    def test_make_output_dirs_with_unknown_parents(self):
+        path = os.path.join(self.dest, "x", "y", "z", "index.html")
+        self.assertEqual(make_output_dirs([path], set()), 3)
+        self.assertTrue(os.path.isdir(os.path.dirname(path)))
+
+    def test_writes_every_page(self):
+        paths = [os.path.join(self.dest, f"{i}.html") for i in range(100)]
+        with OutputWriter(threads=3, max_pending_bytes=20) as writer:
+            for i, path in enumerate(paths):
+                writer.write(path, f"<p>{i}</p>".encode())
+        for i, path in enumerate(paths):
+            with open(path) as f:
+                self.assertEqual(f.read(), f"<p>{i}</p>")
+
+    def test_page_larger_than_queue_is_written(self):
+        path = os.path.join(self.dest, "big.html")
+        with OutputWriter(max_pending_bytes=4) as writer:
+            writer.write(os.path.join(self.dest, "small.html"), b"abc")
+            writer.write(path, b"x" * 100)
+        self.assertEqual(os.path.getsize(path), 100)
+        self.assertEqual(writer.pending_bytes, 0)
+
+    def test_stream_if_changed(self):
+        path = os.path.join(self.dest, "index.html")
+        render = lambda write: (write("<p>"), write("a</p>"))
+        self.assertEqual(stream_if_changed(path, render), (8, True))
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(stream_if_changed(path, render), (8, False))
+        self.assertEqual(os.stat(path).st_mtime_ns, 1)
+        self.assertEqual(os.listdir(self.dest), ["index.html"])
+
+    def test_stream_if_changed_removes_temp_file_on_error(self):
+        def render(write):
+            write("<p>")
+            raise ValueError("bad page")
+
+        with self.assertRaises(ValueError):
+            stream_if_changed(os.path.join(self.dest, "index.html"), render)
+        self.assertEqual(os.listdir(self.dest), [])
+
+    def test_identical_file_is_left_untouched(self):
+        path = os.path.join(self.dest, "index.html")
+        self.assertTrue(write_if_changed(path, b"<p>a</p>"))
+        os.utime(path, ns=(1, 1))
+        self.assertFalse(write_if_changed(path, b"<p>a</p>"))
+        self.assertEqual(os.stat(path).st_mtime_ns, 1)
+        self.assertTrue(write_if_changed(path, b"<p>b</p>"))
+        self.assertTrue(write_if_changed(path, b"<p>bb</p>"))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"<p>bb</p>")
+
+    def test_writer_counts_unchanged_pages(self):
+        path = os.path.join(self.dest, "index.html")
+        with OutputWriter() as writer:
+            writer.write(path, b"<p>a</p>")
+        with OutputWriter() as writer:
+            writer.write(path, b"<p>a</p>")
+            writer.write(os.path.join(self.dest, "new.html"), b"<p>n</p>")
+        self.assertEqual((writer.unchanged, writer.unchanged_bytes), (1, 8))
+
+    def test_failed_write_raises_on_close(self):
+        writer = OutputWriter()
+        writer.write(os.path.join(self.dest, "missing", "index.html"), b"x")
+        with self.assertRaises(FileNotFoundError):
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import pickle
+import random
+import tempfile
+import unittest
+
+from block_markdown import markdown_to_html_node
+from htmlnode import ParentNode
+from parse_cache import ParseCache
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_returns_none(self):
+        self.assertIsNone(self.cache.get("# Hello"))
+
+    def test_parse_stores_tree(self):
+        markdown = "# Hello\n\n- **a**\n- [b](/b)"
+        node = self.cache.parse(markdown)
+        cached = self.cache.get(markdown)
+        self.assertIsNotNone(cached)
+        self.assertEqual(cached.to_html(), node.to_html())
+        self.assertEqual(
+            cached.to_html(), markdown_to_html_node(markdown).to_html())
+
+    def test_stored_counts_new_entries(self):
+        self.cache.parse("# Hello")
+        self.cache.parse("# Hello")
+        self.assertEqual(self.cache.stored, 1)
+
+    def test_corrupt_entry_is_a_miss(self):
+        self.cache.parse("# Hello")
+        path = self.cache._entry_path("# Hello")
+        with open(path, "wb") as f:
+            f.write(b"not a pickle")
+        self.assertIsNone(self.cache.get("# Hello"))
+        self.assertEqual(self.cache.parse("# Hello").to_html(),
+                         "<div><h1>Hello</h1></div>")
+
+    def test_any_damaged_entry_is_a_miss_and_removed(self):
+        self.cache.parse("# Hello **world**")
+        path = self.cache._entry_path("# Hello **world**")
+        with open(path, "rb") as f:
+            data = f.read()
+        rng = random.Random(0)
+        damaged = [pickle.dumps("not a tree"), pickle.dumps({"tag": "div"})]
+        for _ in range(300):
+            corrupt = bytearray(data)
+            for _ in range(rng.randint(1, 4)):
+                corrupt[rng.randrange(len(corrupt))] = rng.randrange(256)
+            damaged.append(bytes(corrupt[:rng.randint(1, len(corrupt))]))
+        for corrupt in damaged:
+            with open(path, "wb") as f:
+                f.write(corrupt)
+            node = self.cache.get("# Hello **world**")
+            if node is None:
+                self.assertFalse(os.path.exists(path))
+            else:
+                self.assertIsInstance(node, ParentNode)
+
+    def test_prune_evicts_least_recently_used(self):
+        for i, markdown in enumerate(("# One", "# Two", "# Three")):
+            self.cache.parse(markdown)
+            os.utime(self.cache._entry_path(markdown), ns=(i, i))
+        # Reading "# One" makes it the most recently used entry
+        self.cache.get("# One")
+        self.cache.max_bytes = sum(
+            os.path.getsize(self.cache._entry_path(markdown))
+            for markdown in ("# One", "# Three"))
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertIsNone(self.cache.get("# Two"))
+        self.assertIsNotNone(self.cache.get("# One"))
+
+    def test_prune_within_limit_keeps_everything(self):
+        self.cache.parse("# One")
+        self.assertEqual(self.cache.prune(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from profiling import PROFILE_STAGES, BuildProfile
+
+
+def timings(**stages):
+    result = dict.fromkeys(PROFILE_STAGES, 0.0)
+    result.update(stages)
+    return result
+
+
+class TestBuildProfile(unittest.TestCase):
+    def setUp(self):
+        self.profile = BuildProfile()
+        self.profile.add("a.md", timings(read=0.001, parse=0.002))
+        self.profile.add("b.md", timings(parse=2.5, write=0.1))
+        self.profile.add("c.md", timings(render=0.01))
+
+    def test_totals(self):
+        totals = self.profile.totals()
+        self.assertAlmostEqual(totals["parse"], 2.502)
+        self.assertAlmostEqual(totals["write"], 0.1)
+        self.assertEqual(totals["blocks"], 0.0)
+
+    def test_slowest(self):
+        slowest = self.profile.slowest(2)
+        self.assertEqual([src for src, _ in slowest], ["b.md", "c.md"])
+
+    def test_report_lists_stages_and_slowest_page(self):
+        report = self.profile.report(top=1)
+        for stage in PROFILE_STAGES:
+            self.assertIn(stage, report)
+        self.assertIn("Slowest 1 pages:", report)
+        self.assertIn("b.md (mostly parse: 2500.00 ms)", report)
+        self.assertNotIn("c.md", report)
+
+    def test_report_empty(self):
+        self.assertEqual(BuildProfile().report(), "No pages were generated.")
+
+
+if __name__ == "__main__":
+    unittest.main()
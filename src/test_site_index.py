@@ -0,0 +1,72 @@
+import os
+import unittest
+
+from site_index import ASSET, PAGE, SiteIndex, page_file_name, scan_sources
+from temp_dir_test_case import TempDirTestCase
+
+
+class TestSiteIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "public")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.dest, "index.html"), "<html></html>")
+
+    def test_page_file_name(self):
+        self.assertEqual(page_file_name("blog/post.md"), "blog/post.html")
+        self.assertEqual(page_file_name("notes.txt"), "notes.txt")
+
+    def test_sources_carry_stat_and_output_path(self):
+        src = os.path.join(self.content, "blog", "post.md")
+        os.utime(src, ns=(1, 12345))
+        pages = scan_sources(self.content, self.dest, PAGE)
+        self.assertEqual(
+            [page.path for page in pages],
+            [os.path.join(self.content, "blog", "post.md"),
+             os.path.join(self.content, "index.md")])
+        post = pages[0]
+        self.assertEqual(post.kind, PAGE)
+        self.assertEqual((post.size, post.mtime_ns), (6, 12345))
+        self.assertEqual(post.dest_path, os.path.join(self.dest, "blog", "post.html"))
+
+    def test_scan_indexes_sources_and_outputs(self):
+        index = SiteIndex.scan(self.content, self.static, self.dest)
+        self.assertEqual(len(index.pages), 2)
+        self.assertEqual(
+            [(asset.kind, asset.dest_path) for asset in index.assets],
+            [(ASSET, os.path.join(self.dest, "images", "a.png"))])
+        self.assertEqual(list(index.outputs), [os.path.join(self.dest, "index.html")])
+        self.assertEqual(index.output_stat(os.path.join(self.dest, "index.html")).st_size, 13)
+        self.assertIsNone(index.output_stat(os.path.join(self.dest, "missing.html")))
+
+    def test_missing_output_directory(self):
+        index = SiteIndex.scan(self.content, None, os.path.join(self.root, "nope"))
+        self.assertEqual((index.assets, index.outputs), ([], {}))
+
+    def test_makedirs_creates_unknown_directories(self):
+        index = SiteIndex.scan(None, None, self.dest)
+        path = os.path.join(self.dest, "a", "b")
+        index.makedirs(path)
+        self.assertTrue(os.path.isdir(path))
+        self.assertIn(path, index.output_dirs)
+
+    def test_prune_outputs_removes_unkept_files_and_empty_dirs(self):
+        kept = os.path.join(self.dest, "index.html")
+        stale = os.path.join(self.dest, "old", "deep", "page.html")
+        self.write(stale, "<html></html>")
+        index = SiteIndex.scan(None, None, self.dest)
+        self.assertEqual(index.prune_outputs({kept}), [stale])
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "old")))
+
+    def test_missing_source_directory_raises(self):
+        with self.assertRaises(NotADirectoryError):
+            SiteIndex.scan(os.path.join(self.root, "nope"), None, self.dest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.render("Hi", "<p>text</p>"),
+            "<title>Hi</title><body><p>text</p></body>")
+
+    def test_render_content_before_title(self):
+        template = Template("{{ Content }}|{{ Title }}")
+        self.assertEqual(template.render("T", "C"), "C|T")
+
+    def test_render_repeated_slot(self):
+        template = Template("{{ Title }} - {{ Title }}")
+        self.assertEqual(template.render("T", "C"), "T - T")
+
+    def test_render_without_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render("T", "C"), "<p>static</p>")
+
+    def test_basepath_rewrites_template_urls(self):
+        template = Template(
+            '<link href="/index.css" /><img src="/a.png" />{{ Content }}',
+            "/repo/")
+        self.assertEqual(
+            template.render("T", "C"),
+            '<link href="/repo/index.css" /><img src="/repo/a.png" />C')
+
+    def test_content_is_not_rescanned(self):
+        template = Template("{{ Title }}{{ Content }}")
+        self.assertEqual(template.render("{{ Content }}", "x"), "{{ Content }}x")
+
+    def test_write_rewrites_content_urls_on_props(self):
+        template = Template("{{ Content }}", "/repo/")
+        content = ParentNode("div", [
+            LeafNode("a", "x", {"href": "/x"}),
+            LeafNode("code", 'href="/not-a-link"'),
+        ])
+        parts = []
+        template.write(parts.append, "T", content)
+        self.assertEqual(
+            "".join(parts),
+            '<div><a href="/repo/x">x</a><code>href="/not-a-link"</code></div>')
+
+    def test_write_streams_same_output_as_render(self):
+        template = Template(
+            '<title>{{ Title }}</title><link href="/a.css">{{ Content }}', "/repo/")
+        content = ParentNode("div", [
+            LeafNode("a", "x", {"href": "/x"}),
+            LeafNode("img", "", {"src": "/y.png", "alt": "y"}),
+        ])
+        parts = []
+        template.write(parts.append, "T", content)
+        self.assertEqual(
+            "".join(parts),
+            template.render("T", content.to_html(template.rewrite_url)))
+        self.assertIn('<img src="/repo/y.png" alt="y">', "".join(parts))
+        self.assertGreater(len(parts), 3)
+
+    def test_root_basepath_needs_no_rewriter(self):
+        self.assertIsNone(Template("{{ Content }}").rewrite_url)
+
+    def test_fingerprinted_assets_are_rewritten(self):
+        template = Template(
+            '<link href="/index.css">{{ Content }}',
+            assets={"/index.css": "/index.3f9a1c2b.css", "/a.png": "/a.5400ebbd.png"})
+        parts = []
+        template.write(parts.append, "T", LeafNode("img", "", {"src": "/a.png"}))
+        self.assertEqual(
+            "".join(parts), '<link href="/index.3f9a1c2b.css"><img src="/a.5400ebbd.png"></img>')
+
+    def test_digest_tracks_source_text(self):
+        self.assertEqual(Template("a").digest, Template("a", "/repo/").digest)
+        self.assertNotEqual(Template("a").digest, Template("b").digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,6 +14,10 @@ class TestTextNode(unittest.TestCase):
         node = TextNode("click", TextType.LINK, "https://example.com")
         self.assertEqual(node.url, "https://example.com")
 
+    def test_no_instance_dict(self):
+        node = TextNode("hello", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
     # __eq__
     def test_eq_same_properties(self):
         node = TextNode("This is a text node", TextType.BOLD)
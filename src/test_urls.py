@@ -0,0 +1,44 @@
+import unittest
+
+from urls import UrlRewriter
+
+
+class TestUrlRewriter(unittest.TestCase):
+    def setUp(self):
+        self.rewrite = UrlRewriter("/repo/")
+
+    def test_absolute_path(self):
+        self.assertEqual(self.rewrite("/blog/tom"), "/repo/blog/tom")
+
+    def test_root(self):
+        self.assertEqual(self.rewrite("/"), "/repo/")
+
+    def test_external_url_untouched(self):
+        self.assertEqual(
+            self.rewrite("https://example.com/a"), "https://example.com/a")
+
+    def test_relative_url_untouched(self):
+        self.assertEqual(self.rewrite("images/a.png"), "images/a.png")
+
+    def test_protocol_relative_url_untouched(self):
+        self.assertEqual(self.rewrite("//cdn.com/a.js"), "//cdn.com/a.js")
+
+    def test_rewrite_html(self):
+        html = '<link href="/index.css" rel="stylesheet" /><img src="/a.png" alt="/x" />'
+        self.assertEqual(
+            self.rewrite.rewrite_html(html),
+            '<link href="/repo/index.css" rel="stylesheet" /><img src="/repo/a.png" alt="/x" />')
+
+    def test_fingerprinted_asset(self):
+        rewrite = UrlRewriter("/repo/", {"/index.css": "/index.3f9a1c2b.css"})
+        self.assertEqual(rewrite("/index.css"), "/repo/index.3f9a1c2b.css")
+        self.assertEqual(rewrite("/index.css?v=1#top"), "/repo/index.3f9a1c2b.css?v=1#top")
+        self.assertEqual(rewrite("/other.css"), "/repo/other.css")
+
+    def test_fingerprinted_asset_at_root(self):
+        rewrite = UrlRewriter("/", {"/a.png": "/a.3f9a1c2b.png"})
+        self.assertEqual(rewrite("/a.png"), "/a.3f9a1c2b.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
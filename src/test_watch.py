@@ -0,0 +1,167 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import watch
+from file_operations import generate_pages_recursive
+from manifest import BuildManifest, build_config_key
+from temp_dir_test_case import TempDirTestCase
+from template import Template
+from watch import ReloadState, SiteWatcher, diff_snapshots, snapshot
+
+
+class TestSnapshots(unittest.TestCase):
+    def test_snapshot_walks_subdirectories(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "a"))
+            for path in ("x.md", os.path.join("a", "y.md")):
+                with open(os.path.join(tmp, path), "w") as f:
+                    f.write("hi")
+            files = snapshot(tmp)
+        self.assertEqual(
+            sorted(files), [os.path.join(tmp, "a", "y.md"), os.path.join(tmp, "x.md")])
+        self.assertEqual(files[os.path.join(tmp, "x.md")][0], 2)
+
+    def test_snapshot_missing_dir(self):
+        self.assertEqual(snapshot("/nonexistent/dir"), {})
+
+    def test_diff_snapshots(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (1, 2), "d": (1, 1)}
+        self.assertEqual(diff_snapshots(old, new), (["b", "d"], ["c"]))
+
+
+class TestReloadState(unittest.TestCase):
+    def test_wait_returns_immediately_when_version_differs(self):
+        state = ReloadState()
+        state.bump()
+        self.assertEqual(state.wait("0", timeout=5), 1)
+
+    def test_wait_times_out_without_change(self):
+        state = ReloadState()
+        self.assertEqual(state.wait("0", timeout=0.01), 0)
+
+
+class TestSiteWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.root
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.dest = os.path.join(root, "docs")
+        self.template_path = os.path.join(root, "template.html")
+        for name, value in (
+            ("dir_path_content", self.content), ("dir_path_static", self.static),
+            ("dir_path_public", self.dest), ("template_path", self.template_path),
+        ):
+            patcher = mock.patch.object(watch, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[A](/a)")
+        self.write(os.path.join(self.content, "a", "index.md"), "# A")
+        self.write(os.path.join(self.static, "style.css"), "body {}")
+        template = Template.load(self.template_path)
+        manifest = BuildManifest(
+            os.path.join(root, "manifest.json"), build_config_key(template))
+        generate_pages_recursive(self.content, template, self.dest, manifest)
+        self.watcher = SiteWatcher(template, manifest)
+
+    def test_changed_page_rebuilds_only_that_page(self):
+        home = os.path.join(self.dest, "index.html")
+        os.utime(home, ns=(1, 1))
+        self.write(os.path.join(self.content, "a", "index.md"), "# A changed")
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertIn("A changed", self.read(os.path.join(self.dest, "a", "index.html")))
+        self.assertEqual(os.stat(home).st_mtime_ns, 1)
+        self.assertEqual(self.watcher.poll(), 0)
+
+    def test_deleted_source_removes_output(self):
+        os.remove(os.path.join(self.content, "a", "index.md"))
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "a", "index.html")))
+        self.assertNotIn(
+            os.path.join(self.dest, "a", "index.html"), self.watcher.manifest.pages)
+
+    def test_changed_asset_is_copied(self):
+        self.write(os.path.join(self.static, "style.css"), "body { color: red }")
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertEqual(
+            self.read(os.path.join(self.dest, "style.css")), "body { color: red }")
+
+    def test_template_change_rebuilds_every_page(self):
+        self.write(self.template_path, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.watcher.poll(), 2)
+        for path in ("index.html", os.path.join("a", "index.html")):
+            self.assertTrue(self.read(os.path.join(self.dest, path)).startswith("<h1>"))
+
+    def test_broken_page_doesnt_stop_a_template_rebuild(self):
+        broken = os.path.join(self.content, "a", "index.md")
+        self.write(broken, "no title")
+        with self.assertLogs("watch", level="ERROR"):
+            self.assertEqual(self.watcher.poll(), 0)
+        self.write(self.template_path, "<h1>{{ Title }}</h1>{{ Content }}")
+        with self.assertLogs("watch", level="ERROR"):
+            self.assertEqual(self.watcher.poll(), 1)
+        self.assertTrue(self.read(os.path.join(self.dest, "index.html")).startswith("<h1>"))
+        self.assertEqual(self.watcher.pending, {broken})
+
+        self.write(broken, "# A fixed")
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertTrue(
+            self.read(os.path.join(self.dest, "a", "index.html")).startswith("<h1>"))
+        self.assertEqual(self.watcher.pending, set())
+
+    def test_touched_template_rebuilds_nothing(self):
+        os.utime(self.template_path, ns=(1, 1))
+        self.assertEqual(self.watcher.poll(), 0)
+
+    def test_missing_template_waits_for_it_to_return(self):
+        moved = self.template_path + ".swp"
+        os.rename(self.template_path, moved)
+        self.assertEqual(self.watcher.poll(), 0)
+        os.rename(moved, self.template_path)
+        self.write(self.template_path, "<h2>{{ Title }}</h2>{{ Content }}")
+        self.assertEqual(self.watcher.poll(), 2)
+        self.assertTrue(self.read(os.path.join(self.dest, "index.html")).startswith("<h2>"))
+
+    def test_snapshot_skips_files_that_vanish(self):
+        # Deleted between the directory listing and its stat
+        vanished = os.path.join(self.content, "a", "index.md")
+        real_scandir = os.scandir
+
+        class Entry:
+            def __init__(self, entry):
+                self.entry = entry
+                self.path = entry.path
+
+            def is_dir(self):
+                return self.entry.is_dir()
+
+            def is_file(self):
+                return self.entry.is_file()
+
+            def stat(self):
+                if self.path == vanished:
+                    raise FileNotFoundError(self.path)
+                return self.entry.stat()
+
+        class Entries:
+            def __init__(self, path):
+                self.entries = real_scandir(path)
+
+            def __enter__(self):
+                return (Entry(entry) for entry in self.entries)
+
+            def __exit__(self, *exc):
+                self.entries.close()
+
+        with mock.patch.object(watch.os, "scandir", Entries):
+            files = snapshot(self.content)
+        self.assertEqual(list(files), [os.path.join(self.content, "index.md")])
+
+
+if __name__ == "__main__":
+    unittest.main()
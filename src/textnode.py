@@ -13,6 +13,9 @@ class TextType(Enum):
 
 
 class TextNode:
+    # No per-instance __dict__; one TextNode is created per inline span
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(
         self,
         text: str,
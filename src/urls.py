@@ -0,0 +1,38 @@
+import re
+
+# href="..." / src="..." attributes in raw HTML such as the page template
+_URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+
+# Props whose values are URLs and get rewritten at render time
+URL_PROPS = ("href", "src")
+
+# Start of a URL's query string or fragment
+_URL_SUFFIX_PATTERN = re.compile(r"[?#]")
+
+
+# Maps site-absolute URLs ("/blog/tom") to their deployed location under
+# the basepath ("/repo-name/blog/tom"), e.g. for GitHub Pages. Relative
+# URLs, external URLs and protocol-relative URLs ("//cdn...") are untouched.
+# `assets` maps site-absolute asset URLs to their fingerprinted names
+# ("/index.css" -> "/index.3f9a1c2b.css"), applied before the basepath.
+class UrlRewriter:
+    def __init__(self, basepath: str = "/", assets: dict[str, str] | None = None) -> None:
+        self.basepath = basepath
+        self.assets = assets or {}
+
+    def __call__(self, url: str) -> str:
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+        if self.assets:
+            match = _URL_SUFFIX_PATTERN.search(url)
+            end = match.start() if match else len(url)
+            url = self.assets.get(url[:end], url[:end]) + url[end:]
+        return self.basepath + url[1:]
+
+    # Rewrites the href/src attributes in a fragment of raw HTML
+    def rewrite_html(self, html: str) -> str:
+        return _URL_ATTRIBUTE_PATTERN.sub(
+            lambda match: f'{match.group(1)}="{self(match.group(2))}"', html)
+
+    def __repr__(self) -> str:
+        return f"UrlRewriter({self.basepath}, assets={len(self.assets)})"
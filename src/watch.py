@@ -0,0 +1,292 @@
+import logging
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from dependencies import page_dependencies
+from file_operations import copy_file, generate_page
+from main import build, build_parser, configure_logging, dir_path_content, dir_path_public, dir_path_static, parse_cache_from_args, template_path
+from manifest import BuildManifest, build_config_key
+from parse_cache import ParseCache
+from site_index import page_file_name
+from template import Template
+
+_RELOAD_PATH = "/__livereload"
+
+logger = logging.getLogger(__name__)
+
+# Injected into served HTML only (never written to disk). Long-polls the
+# server for the build version and reloads the page as soon as it changes.
+_RELOAD_SCRIPT = b"""<script>
+(async () => {
+  let version = null;
+  for (;;) {
+    try {
+      const res = await fetch("/__livereload?v=" + (version ?? ""));
+      const next = await res.text();
+      if (version !== null && next !== version) location.reload();
+      version = next;
+    } catch (e) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+  }
+})();
+</script>"""
+
+
+# Returns {path: (size, mtime_ns)} for every file under dir_path. Files that
+# vanish while it runs (e.g. an editor's temporary files) are left out.
+def snapshot(dir_path: str) -> dict[str, tuple[int, int]]:
+    files: dict[str, tuple[int, int]] = {}
+    if not os.path.isdir(dir_path):
+        return files
+
+    stack = [dir_path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+# Compares two snapshots; returns (added or modified paths, removed paths)
+def diff_snapshots(
+    old: dict[str, tuple[int, int]],
+    new: dict[str, tuple[int, int]]
+) -> tuple[list[str], list[str]]:
+    changed = sorted(path for path, stat in new.items() if old.get(path) != stat)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+
+# Build version shared between the watcher and the HTTP handlers; bumping
+# it wakes every browser waiting on the live-reload endpoint.
+class ReloadState:
+    def __init__(self) -> None:
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def bump(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, seen: str, timeout: float) -> int:
+        with self.condition:
+            self.condition.wait_for(
+                lambda: str(self.version) != seen, timeout)
+            return self.version
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, reload_state: ReloadState, **kwargs) -> None:
+        self.reload_state = reload_state
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == _RELOAD_PATH:
+            version = self.reload_state.wait(query.removeprefix("v="), 30)
+            self._send(str(version).encode(), "text/plain")
+            return
+
+        file_path = self.translate_path(path)
+        if path.endswith("/"):
+            file_path = os.path.join(file_path, "index.html")
+        if not file_path.endswith(".html") or not os.path.isfile(file_path):
+            super().do_GET()
+            return
+
+        with open(file_path, "rb") as f:
+            body = f.read()
+        body = body.replace(b"</body>", _RELOAD_SCRIPT + b"</body>", 1)
+        self._send(body, "text/html; charset=utf-8")
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Polls the content, static and template sources and rebuilds only what
+# changed: edited pages are regenerated with generate_page, edited assets
+# are re-copied, and outputs of deleted sources are removed. A template
+# change rebuilds every page, one at a time: a page that fails stays
+# pending and is retried on the next poll that sees a change, so fixing it
+# brings the whole site up to date with the new template.
+class SiteWatcher:
+    def __init__(
+        self,
+        template: Template,
+        manifest: BuildManifest,
+        copy_strategy: str = "copy",
+        cache: ParseCache | None = None
+    ) -> None:
+        self.template = template
+        self.manifest = manifest
+        self.cache = cache
+        self.copy_strategy = copy_strategy
+        self.content = snapshot(dir_path_content)
+        self.static = snapshot(dir_path_static)
+        self.template_stat = self._template_stat()
+        # Pages not yet rebuilt since the template or basepath changed
+        self.pending: set[str] = set()
+
+    # None while the template is missing, e.g. mid save-by-rename
+    def _template_stat(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(template_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    # Returns the number of outputs rebuilt, copied or removed
+    def poll(self) -> int:
+        content = snapshot(dir_path_content)
+        static = snapshot(dir_path_static)
+        template_stat = self._template_stat()
+        changed_pages, removed_pages = diff_snapshots(self.content, content)
+        changed_assets, removed_assets = diff_snapshots(self.static, static)
+        # A missing template is compared again once it reappears
+        template_changed = (
+            template_stat is not None and template_stat != self.template_stat)
+        self.content, self.static = content, static
+        if template_stat is not None:
+            self.template_stat = template_stat
+
+        updated = 0
+        for src_path in removed_pages:
+            self.pending.discard(src_path)
+            self.manifest.forget(self._page_dest(src_path))
+            updated += 1
+        for src_path in removed_assets:
+            self.manifest.forget(self._asset_dest(src_path))
+            updated += 1
+
+        if template_changed:
+            self._reload_template()
+        # Pages linking to an edited page render the same, so only the
+        # edited pages themselves are rebuilt (plus any still pending)
+        if changed_pages or template_changed:
+            pages = {self._page_dest(path) for path in self.content}
+            outputs = pages.union(self._asset_dest(path) for path in self.static)
+            for src_path in sorted(self.pending.union(changed_pages)):
+                if self._rebuild_page(src_path, outputs, pages):
+                    self.pending.discard(src_path)
+                    updated += 1
+
+        for src_path in changed_assets:
+            dest_path = self._asset_dest(src_path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            copy_file(src_path, dest_path, self.copy_strategy)
+            self.manifest.record_asset(src_path, dest_path)
+            updated += 1
+
+        if updated:
+            self.manifest.save()
+        return updated
+
+    def _page_dest(self, src_path: str) -> str:
+        rel_path = os.path.relpath(src_path, dir_path_content)
+        return os.path.join(dir_path_public, page_file_name(rel_path))
+
+    def _asset_dest(self, src_path: str) -> str:
+        rel_path = os.path.relpath(src_path, dir_path_static)
+        return os.path.join(dir_path_public, rel_path)
+
+    # Returns whether the page was rebuilt
+    def _rebuild_page(
+        self, src_path: str, outputs: set[str], pages: set[str]
+    ) -> bool:
+        dest_path = self._page_dest(src_path)
+        urls: set[str] = set()
+        # A broken page shouldn't stop the dev server; report and carry on
+        try:
+            _, digest = generate_page(
+                src_path, self.template, dest_path, self.cache, urls=urls)
+        except Exception as e:
+            logger.error("Error generating %s: %s", src_path, e)
+            return False
+        # The snapshot stat was taken before the page was read, so a later
+        # edit still shows up as a change
+        self.manifest.record(
+            src_path, dest_path, self.content[src_path],
+            page_dependencies(urls, dest_path, dir_path_public, outputs, pages),
+            digest)
+        return True
+
+    # Loads the edited template; if it renders pages differently (not just
+    # a touched file), every page is queued for a rebuild
+    def _reload_template(self):
+        try:
+            self.template = Template.load(template_path, self.template.basepath)
+        except OSError as e:
+            logger.error("Error loading %s: %s", template_path, e)
+            return
+        config_key = build_config_key(self.template)
+        if config_key != self.manifest.config_key:
+            self.manifest.set_config_key(config_key)
+            self.pending = set(self.content)
+
+
+def main():
+    parser = build_parser()
+    parser.description = "Build the site, serve it and rebuild on changes."
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--interval", type=float, default=0.05,
+        help="seconds between checks for changed sources")
+    args = parser.parse_args()
+    configure_logging(args)
+    # Watch mode always builds on top of the existing output, and serves
+    # assets under their original names so edits don't rename them
+    args.incremental = True
+    args.fingerprint = False
+
+    template, manifest = build(args)
+    reload_state = ReloadState()
+    handler = partial(
+        LiveReloadHandler, directory=dir_path_public, reload_state=reload_state)
+    server = ThreadingHTTPServer(("", args.port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(
+        "Serving %s at http://localhost:%d/ (watching for changes, Ctrl+C to stop)",
+        dir_path_public, args.port)
+
+    watcher = SiteWatcher(
+        template, manifest, args.copy_strategy, parse_cache_from_args(args))
+    try:
+        while True:
+            time.sleep(args.interval)
+            start = time.perf_counter()
+            # Nothing that goes wrong in one poll should stop the dev server
+            try:
+                updated = watcher.poll()
+            except Exception as e:
+                logger.error("Error rebuilding: %s", e)
+                continue
+            if updated:
+                elapsed = (time.perf_counter() - start) * 1000
+                logger.info("Updated %d outputs in %.0f ms", updated, elapsed)
+                reload_state.bump()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()